@@ -18,7 +18,7 @@ from dotenv import load_dotenv
 
 load_dotenv()
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -250,6 +250,13 @@ async def startup_event():
     print("\n" + "=" * 80)
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers and close pooled connections."""
+    if agent:
+        await agent.aclose()
+
+
 async def settle_pending_requests(price_override: Optional[int] = None) -> List[Dict[str, Any]]:
     if not agent or not agent.oracle_client:
         return []
@@ -394,6 +401,15 @@ async def api_run_oracle():
     return {"settlements": results}
 
 
+@app.post("/api/oracle/notify")
+async def api_notify_oracle():
+    """Wake the oracle watcher, e.g. after a new request was submitted on-chain."""
+    if not agent or not agent.oracle_client:
+        raise HTTPException(status_code=503, detail="Oracle client not configured")
+    agent.notify_oracle_worker()
+    return {"notified": True}
+
+
 @app.get("/api/wallet")
 async def get_wallet():
     """Get wallet address and balance for funding."""
@@ -469,7 +485,7 @@ async def get_status():
             "enabled": True,
             "endpoint": tee_auth.tee_endpoint if tee_auth else None
         },
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
 
@@ -502,7 +518,7 @@ async def sign_message(request: SignRequest):
             "eip191_signature": signed_message.signature.hex(),
             "signer_address": await agent._get_agent_address(),
             "domain": agent.config.domain,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "verification": {
                 "note": "Use eth_account.Account.recover_message() to verify EIP-191 signature",
                 "expected_address": await agent._get_agent_address()
@@ -568,7 +584,7 @@ async def get_attestation():
             "application_data": attestation.get("application_data"),
             "quote_size": len(attestation.get("quote", "")),
             "event_log_size": len(attestation.get("event_log", "")),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
 
         # Include full quote and event log
@@ -821,7 +837,7 @@ async def execute_task(task_id: str, request: Dict[str, Any]):
         result = await agent.process_task(request)
         bundle = {
             "task_id": task_id,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "request": request,
             "result": result
         }
@@ -844,7 +860,7 @@ async def execute_task(task_id: str, request: Dict[str, Any]):
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
 
 
 @app.get("/evidence", response_class=HTMLResponse)
@@ -895,6 +911,25 @@ async def evidence_index():
     return HTMLResponse(content)
 
 
+def _render_evidence_record(record: Any, heading: str) -> Tuple[str, str]:
+    """Return escaped metadata JSON and the generated-script section for one evidence record."""
+    script_section = ""
+    sanitized = record
+    if isinstance(record, dict) and "script" in record:
+        script_value = record.get("script")
+        if script_value is not None:
+            if not isinstance(script_value, str):
+                script_value = json.dumps(script_value, indent=2)
+            script_section = (
+                f"<{heading}>Generated Script</{heading}>"
+                f"<pre class='code'>{escape(script_value)}</pre>"
+            )
+        sanitized = dict(record)
+        sanitized.pop("script", None)
+    pretty = json.dumps(sanitized, indent=2, sort_keys=True)
+    return escape(pretty), script_section
+
+
 @app.get("/evidence/{file_path:path}")
 async def evidence_detail(file_path: str, download: bool = False):
     """Serve evidence files either as download or rendered HTML."""
@@ -919,28 +954,32 @@ async def evidence_detail(file_path: str, download: bool = False):
             media_type="application/octet-stream",
         )
 
-    metadata_display = ""
-    script_section = ""
     try:
         text = resolved.read_text(encoding="utf-8")
-        try:
-            parsed = json.loads(text)
-            sanitized = parsed
-            if isinstance(parsed, dict) and "script" in parsed:
-                script_value = parsed.get("script")
-                if script_value is not None:
-                    if not isinstance(script_value, str):
-                        script_value = json.dumps(script_value, indent=2)
-                    script_section = (
-                        "<h2>Generated Script</h2>"
-                        f"<pre class='code'>{escape(script_value)}</pre>"
-                    )
-                sanitized = dict(parsed)
-                sanitized.pop("script", None)
-            pretty = json.dumps(sanitized, indent=2, sort_keys=True)
-            metadata_display = escape(pretty)
-        except json.JSONDecodeError:
-            metadata_display = escape(text)
+        if resolved.suffix == ".ndjson":
+            # Daily evidence logs hold one settlement per line; render each separately.
+            sections = []
+            for line in text.splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    sections.append(f"<h2>Unparsed Entry</h2><pre class=\"json\">{escape(line)}</pre>")
+                    continue
+                request_id = record.get("requestId", "unknown") if isinstance(record, dict) else "unknown"
+                metadata_display, script_section = _render_evidence_record(record, "h3")
+                sections.append(
+                    f"<h2>Request {escape(str(request_id))}</h2>"
+                    f"<h3>Metadata</h3><pre class=\"json\">{metadata_display}</pre>{script_section}"
+                )
+            body_sections = "".join(sections) or "<p>No settlements recorded in this file.</p>"
+        else:
+            try:
+                metadata_display, script_section = _render_evidence_record(json.loads(text), "h2")
+            except json.JSONDecodeError:
+                metadata_display, script_section = escape(text), ""
+            body_sections = f"<h2>Metadata</h2><pre class=\"json\">{metadata_display}</pre>{script_section}"
     except UnicodeDecodeError:
         raise HTTPException(
             status_code=415,
@@ -973,9 +1012,7 @@ async def evidence_detail(file_path: str, download: bool = False):
             <a href="{back_link}">← Back to overview</a>
             <a href="{download_link}">Download</a>
         </p>
-        <h2>Metadata</h2>
-        <pre class="json">{metadata_display}</pre>
-        {script_section}
+        {body_sections}
     </body>
     </html>
     """
@@ -134,7 +134,11 @@ def run(price_override: Optional[int]) -> None:
             return
         mode = "manual override" if price_override is not None else "AI resolver"
         print(f"Running oracle cycle using {mode}...")
-        results = await settle_pending_requests(agent, price_override)
+        try:
+            results = await settle_pending_requests(agent, price_override)
+        finally:
+            # Flush background evidence writes before the event loop shuts down.
+            await agent.aclose()
         if not results:
             print("No pending requests")
         else:
@@ -43,6 +43,7 @@ setup(
         "fastapi>=0.104.0",
         "uvicorn>=0.24.0",
         "eth-utils>=2.2.0",
+        "orjson>=3.9.0",
         "openai>=1.0.0",
     ],
     extras_require={
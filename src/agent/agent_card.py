@@ -5,7 +5,7 @@ Creates properly formatted agent cards according to the ERC-8004 specification.
 """
 
 from typing import Dict, Any, List, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 
 
 class AgentCardBuilder:
@@ -245,7 +245,7 @@ class AgentCardBuilder:
         """
         # Add timestamp if not already present
         if "createdAt" not in self.card:
-            self.card["createdAt"] = datetime.utcnow().isoformat() + "Z"
+            self.card["createdAt"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
 
         return self.card
 
@@ -4,7 +4,7 @@ import os
 import json
 import secrets
 from typing import Dict, Any, Optional, Tuple
-from datetime import datetime
+from datetime import datetime, timezone
 
 import httpx
 import asyncio
@@ -17,6 +17,20 @@ except ImportError as exc:  # pragma: no cover - dependency missing
 else:
     _OPENAI_IMPORT_ERROR = None
 
+# Streamed responses opening with refusal prose are abandoned once this many characters arrive.
+REFUSAL_CHECK_CHARS = 120
+REFUSAL_PREFIXES = (
+    "i cannot",
+    "i can't",
+    "i can not",
+    "i'm sorry",
+    "i am sorry",
+    "sorry",
+    "i'm unable",
+    "i am unable",
+    "as an ai",
+)
+
 
 class AIScriptGenerator:
     """Generate code using configurable AI backends (RedPill or local Ollama)."""
@@ -58,34 +72,48 @@ class AIScriptGenerator:
         self,
         task_description: str,
         context: Dict[str, Any] = None,
-        include_attestation: bool = True
+        include_attestation: bool = True,
+        *,
+        defer_attestation: bool = False
     ) -> Tuple[str, Optional[Dict[str, Any]]]:
         """
         Generate Python code from natural language with TEE attestation.
 
+        With ``defer_attestation`` the report is not fetched yet; pass the returned
+        attestation to complete_attestation() once the code is known to be kept.
+
         Returns:
             (code, attestation_data) tuple
         """
         prompt = self._build_prompt("python", task_description, context)
         attestation_flag = include_attestation and self.supports_attestation
-        code, attestation = await self._call_ai(prompt, attestation_flag, language="python")
+        code, attestation = await self._call_ai(
+            prompt, attestation_flag, language="python", defer_attestation=defer_attestation
+        )
         return code, attestation
 
     async def generate_javascript_script(
         self,
         task_description: str,
         context: Dict[str, Any] = None,
-        include_attestation: bool = True
+        include_attestation: bool = True,
+        *,
+        defer_attestation: bool = False
     ) -> Tuple[str, Optional[Dict[str, Any]]]:
         """
         Generate JavaScript code from natural language with TEE attestation.
 
+        With ``defer_attestation`` the report is not fetched yet; pass the returned
+        attestation to complete_attestation() once the code is known to be kept.
+
         Returns:
             (code, attestation_data) tuple
         """
         prompt = self._build_prompt("javascript", task_description, context)
         attestation_flag = include_attestation and self.supports_attestation
-        code, attestation = await self._call_ai(prompt, attestation_flag, language="javascript")
+        code, attestation = await self._call_ai(
+            prompt, attestation_flag, language="javascript", defer_attestation=defer_attestation
+        )
         return code, attestation
 
     def _build_prompt(
@@ -144,9 +172,12 @@ Output format: Pure JavaScript code only"""
         prompt: str,
         include_attestation: bool,
         *,
-        language: str
+        language: str,
+        defer_attestation: bool = False
     ) -> Tuple[str, Optional[Dict[str, Any]]]:
-        return await self._call_openai(prompt, include_attestation, language=language)
+        return await self._call_openai(
+            prompt, include_attestation, language=language, defer_attestation=defer_attestation
+        )
 
     def _build_system_prompt(self, language: str) -> str:
         language = language.lower()
@@ -173,6 +204,7 @@ Output format: Pure JavaScript code only"""
         include_attestation: bool,
         *,
         language: str,
+        defer_attestation: bool = False,
     ) -> Tuple[str, Optional[Dict[str, Any]]]:
         """Call OpenAI-compatible endpoint (Ollama or RedPill) for code generation."""
         if not self._client:
@@ -203,6 +235,7 @@ Output format: Pure JavaScript code only"""
 
             stream = self._client.chat.completions.create(stream=True, **kwargs)
             parts: list[str] = []
+            checked = False
             created = None
             usage = None
 
@@ -217,6 +250,13 @@ Output format: Pure JavaScript code only"""
                         parts.append(delta.content)
                     elif getattr(choice, "message", None) and choice.message.content:
                         parts.append(choice.message.content)
+                if not checked and sum(map(len, parts)) >= REFUSAL_CHECK_CHARS:
+                    checked = True
+                    head = "".join(parts).lstrip().lower()
+                    if head.startswith(REFUSAL_PREFIXES):
+                        # Stop paying for tokens of a response that will never be code.
+                        stream.close()
+                        raise Exception(f"Model declined to generate code: {head[:80]!r}")
             return "".join(parts), created, usage
 
         def _run_completion_blocking():
@@ -256,25 +296,40 @@ Output format: Pure JavaScript code only"""
 
         attestation_data = None
         if nonce:
-            try:
-                attestation_data = await self._fetch_attestation(
-                    nonce=nonce,
-                    inference_timestamp=response_meta.get("created") if response_meta else None,
-                    model=self.model,
-                )
-                attestation_data["inference"] = {
+            # The report is looked up by nonce, so fetching it can wait until the caller keeps the code.
+            attestation_data = {
+                "pending": True,
+                "nonce": nonce,
+                "inference": {
                     "model": self.model,
                     "prompt_hash": self._hash_prompt(prompt),
                     "response_hash": self._hash_response(code),
                     "timestamp": response_meta.get("created") if response_meta else None,
                     "usage": response_meta.get("usage") if response_meta else None,
-                }
-            except Exception as exc:
-                print(f"⚠️ Attestation fetch failed (code generation succeeded): {exc}")
-                attestation_data = {"error": f"Attestation unavailable: {exc}"}
+                },
+            }
+            if not defer_attestation:
+                attestation_data = await self.complete_attestation(attestation_data)
 
         return code, attestation_data
 
+    async def complete_attestation(self, attestation: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Fetch the TEE report for a deferred attestation; anything else is returned unchanged."""
+        if not attestation or not attestation.get("pending"):
+            return attestation
+        inference = attestation["inference"]
+        try:
+            report = await self._fetch_attestation(
+                nonce=attestation["nonce"],
+                inference_timestamp=inference.get("timestamp"),
+                model=inference["model"],
+            )
+            report["inference"] = inference
+            return report
+        except Exception as exc:
+            print(f"⚠️ Attestation fetch failed (code generation succeeded): {exc}")
+            return {"error": f"Attestation unavailable: {exc}"}
+
     def _validate_generated_code(self, code: str, language: str) -> None:
         trimmed = code.strip()
         if not trimmed:
@@ -312,7 +367,7 @@ Output format: Pure JavaScript code only"""
             # Add verification metadata
             attestation["verification"] = {
                 "nonce": nonce,
-                "fetched_at": datetime.utcnow().isoformat(),
+                "fetched_at": datetime.now(timezone.utc).isoformat(),
                 "inference_timestamp": inference_timestamp
             }
 
@@ -395,10 +450,12 @@ async def verify_ai_attestation(attestation_data: Dict[str, Any]) -> bool:
             return False
 
         # Check timestamp freshness (within 10 minutes)
-        from datetime import datetime, timedelta
+        from datetime import timedelta
         timestamp = attestation_data["attestation"]["timestamp"]
         att_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-        age = datetime.utcnow() - att_time.replace(tzinfo=None)
+        if att_time.tzinfo is None:
+            att_time = att_time.replace(tzinfo=timezone.utc)
+        age = datetime.now(timezone.utc) - att_time
 
         if age > timedelta(minutes=10):
             return False
@@ -13,7 +13,7 @@ from pathlib import Path
 
 from .tee_auth import TEEAuthenticator
 from .registry import RegistryClient
-from .oracle_client import OracleClient
+from .oracle_client import MULTICALL3_ADDRESS, OracleClient
 from .eip712 import EIP712Signer
 from src.utils.state import load_agent_state, save_agent_state
 
@@ -320,6 +320,8 @@ class BaseAgent(ABC):
             oracle_address=self.registries.tee_oracle,
             adapter_address=self.registries.tee_oracle_adapter,
             account=account,
+            # Set to an empty string to disable batched request lookups.
+            multicall_address=os.getenv("ORACLE_MULTICALL_ADDRESS", MULTICALL3_ADDRESS) or None,
         )
 
     def _init_signer(self):
@@ -2,8 +2,8 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Container, Dict, List, NamedTuple, Optional
 
 from eth_account import Account
 from eth_typing import HexStr
@@ -12,9 +12,48 @@ from web3 import Web3
 from web3.exceptions import BadFunctionCallOutput, ContractLogicError
 from src.utils.contract_loader import load_abi
 
+PRICE_REQUESTED_TOPIC = Web3.to_hex(Web3.keccak(text="PriceRequested(bytes32,address,bytes)"))
+
+# Canonical Multicall3 deployment (same address on nearly every EVM chain).
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [
+    {
+        "type": "function",
+        "name": "aggregate3",
+        "stateMutability": "payable",
+        "inputs": [
+            {
+                "name": "calls",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+            }
+        ],
+        "outputs": [
+            {
+                "name": "returnData",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+            }
+        ],
+    }
+]
+# getRequest() struct layouts, with and without the trailing resolver field.
+REQUEST_TUPLE_TYPES = (
+    "(address,address,uint256,uint256,bytes32,bytes,bool,int256,bytes32,address)",
+    "(address,address,uint256,uint256,bytes32,bytes,bool,int256,bytes32)",
+)
+
+
+class OracleRequest(NamedTuple):
+    """Immutable snapshot of an on-chain request; fields follow the getRequest() struct order."""
 
-@dataclass
-class OracleRequest:
     request_id: bytes
     requester: str
     reward_token: str
@@ -28,7 +67,14 @@ class OracleRequest:
 
 
 class OracleClient:
-    def __init__(self, w3: Web3, oracle_address: str, account: Account, adapter_address: Optional[str] = None):
+    def __init__(
+        self,
+        w3: Web3,
+        oracle_address: str,
+        account: Account,
+        adapter_address: Optional[str] = None,
+        multicall_address: Optional[str] = MULTICALL3_ADDRESS,
+    ):
         self.w3 = w3
         self.account = account
         self.oracle_contract = w3.eth.contract(
@@ -42,6 +88,14 @@ class OracleClient:
                 abi=load_abi("TeeOracleAdapter")
             )
         self._has_get_request = hasattr(self.oracle_contract.functions, "getRequest")
+        self._multicall = None
+        if multicall_address and self._has_get_request:
+            self._multicall = w3.eth.contract(
+                address=Web3.to_checksum_address(multicall_address),
+                abi=MULTICALL3_ABI,
+            )
+        # Serializes nonce allocation + broadcast so settlements can be awaited concurrently.
+        self._send_lock = threading.Lock()
 
     def pending_request_ids(self) -> List[bytes]:
         raw_ids = self.oracle_contract.functions.pendingRequests().call()
@@ -59,21 +113,47 @@ class OracleClient:
         else:
             raw = self._call_requests_with_fallback(request_id)
 
+        return self._build_request(request_id, raw)
+
+    def fetch_requests(self, request_ids: List[bytes]) -> List[OracleRequest]:
+        """Fetch several requests with one Multicall3 ``eth_call``, falling back to per-id lookups."""
+        if len(request_ids) < 2 or self._multicall is None:
+            return [self.fetch_request(req_id) for req_id in request_ids]
+
+        target = self.oracle_contract.address
+        calls = [
+            (target, True, self.oracle_contract.functions.getRequest(req_id)._encode_transaction_data())
+            for req_id in request_ids
+        ]
+        try:
+            results = self._multicall.functions.aggregate3(calls).call()
+        except BadFunctionCallOutput:
+            # Empty or undecodable return data: Multicall3 is missing on this chain
+            # (e.g. a fresh local node), so stop trying.
+            self._multicall = None
+            return [self.fetch_request(req_id) for req_id in request_ids]
+        except Exception:
+            # Transient RPC failure; fall back for this batch only.
+            return [self.fetch_request(req_id) for req_id in request_ids]
+
+        requests: List[OracleRequest] = []
+        for req_id, (success, return_data) in zip(request_ids, results):
+            raw = self._decode_request_struct(bytes(return_data)) if success else None
+            requests.append(self._build_request(req_id, raw) if raw else self.fetch_request(req_id))
+        return requests
+
+    def _decode_request_struct(self, payload: bytes) -> Optional[Any]:
+        for struct_type in REQUEST_TUPLE_TYPES:
+            try:
+                return self.w3.codec.decode([struct_type], payload)[0]
+            except Exception:
+                continue
+        return None
+
+    @staticmethod
+    def _build_request(request_id: bytes, raw: Any) -> OracleRequest:
         # Some deployments append resolver to the struct. We only need the first nine fields.
-        if isinstance(raw, (list, tuple)) and len(raw) >= 10:
-            raw = raw[:9]
-        return OracleRequest(
-            request_id=request_id,
-            requester=raw[0],
-            reward_token=raw[1],
-            reward=raw[2],
-            timestamp=raw[3],
-            identifier=raw[4],
-            ancillary_data=raw[5],
-            settled=raw[6],
-            settled_price=raw[7],
-            evidence_hash=raw[8]
-        )
+        return OracleRequest(request_id, *raw[:9])
 
     def _call_requests_fallback(self, request_id: bytes) -> Any:
         """
@@ -129,19 +209,24 @@ class OracleClient:
         except (BadFunctionCallOutput, ContractLogicError, ValueError):
             return self._call_requests_fallback(request_id)
 
-    def pending_requests(self) -> List[OracleRequest]:
-        return [self.fetch_request(req_id) for req_id in self.pending_request_ids()]
+    def pending_requests(self, skip: Optional[Container[bytes]] = None) -> List[OracleRequest]:
+        """Fetch pending requests, skipping ids in ``skip`` before issuing their RPC lookups."""
+        req_ids = self.pending_request_ids()
+        if skip:
+            req_ids = [req_id for req_id in req_ids if req_id not in skip]
+        return self.fetch_requests(req_ids)
 
     def settle_price(self, request: OracleRequest, price: int, evidence_hash: bytes) -> HexStr:
-        tx = self.oracle_contract.functions.settlePrice(
-            request.identifier,
-            request.timestamp,
-            request.ancillary_data,
-            price,
-            evidence_hash
-        ).build_transaction(self._tx_params())
-        signed_tx = self.account.sign_transaction(tx)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        with self._send_lock:
+            tx = self.oracle_contract.functions.settlePrice(
+                request.identifier,
+                request.timestamp,
+                request.ancillary_data,
+                price,
+                evidence_hash
+            ).build_transaction(self._tx_params())
+            signed_tx = self.account.sign_transaction(tx)
+            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
         receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
         if receipt.status != 1:
             raise RuntimeError(f"settlePrice failed: tx={tx_hash.hex()}")
@@ -152,9 +237,18 @@ class OracleClient:
             "chainId": self.w3.eth.chain_id,
             "gas": 800000,
             "gasPrice": self.w3.eth.gas_price,
-            "nonce": self.w3.eth.get_transaction_count(self.account.address)
+            # Count pending txs so back-to-back settlements get consecutive nonces.
+            "nonce": self.w3.eth.get_transaction_count(self.account.address, "pending")
         }
 
+    def price_requested_filter(self) -> Any:
+        """Create a log filter for new PriceRequested events; poll it with ``get_new_entries()``."""
+        return self.w3.eth.filter({
+            "address": self.oracle_contract.address,
+            "topics": [PRICE_REQUESTED_TOPIC],
+            "fromBlock": "latest",
+        })
+
     @staticmethod
     def compute_request_id(identifier: bytes, timestamp: int, ancillary_data: bytes) -> bytes:
         return Web3.solidity_keccak(["bytes32", "uint256", "bytes"], [identifier, timestamp, ancillary_data])
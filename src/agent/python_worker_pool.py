@@ -0,0 +1,173 @@
+"""Warm pool of Python interpreters for running generated oracle scripts."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+import orjson
+
+# Modules generated oracle scripts import on nearly every run.
+DEFAULT_PRELOAD = ("json", "datetime", "time", "requests")
+
+# Runs inside each worker: preloads the modules named in argv[2], then reads
+# length-prefixed scripts from stdin, execs each in a fresh namespace with
+# stdout/stderr captured, and replies with a length-prefixed JSON record
+# {"stdout", "stderr", "returncode"}. The protocol pipes are moved to private
+# descriptors and fds 0/1 point at /dev/null, so a script reading stdin or
+# writing to fd 1 (directly or via a subprocess) cannot desync the worker.
+_WORKER_HARNESS = r'''
+import importlib, io, json, os, sys, traceback
+
+LIMIT = int(sys.argv[1])
+for _name in filter(None, sys.argv[2].split(",")):
+    try:
+        importlib.import_module(_name)
+    except Exception:
+        pass
+MARKER = "...[truncated]\n"
+_in, _out = os.fdopen(os.dup(0), "rb"), os.fdopen(os.dup(1), "wb")
+_null = os.open(os.devnull, os.O_RDWR)
+os.dup2(_null, 0)
+os.dup2(_null, 1)
+sys.stdin = open(os.devnull)
+
+
+class _Tail(io.TextIOBase):
+    def __init__(self):
+        self.parts, self.size, self.truncated = [], 0, False
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size > 2 * LIMIT:
+            tail = "".join(self.parts)[-LIMIT:]
+            self.parts, self.size, self.truncated = [tail], len(tail), True
+        return len(text)
+
+    def value(self):
+        text = "".join(self.parts)
+        if len(text) > LIMIT:
+            text, self.truncated = text[-LIMIT:], True
+        return MARKER + text if self.truncated else text
+
+
+while True:
+    header = _in.readline()
+    if not header:
+        break
+    code = _in.read(int(header)).decode("utf-8")
+    out, err = _Tail(), _Tail()
+    sys.stdout, sys.stderr = out, err
+    returncode = 0
+    try:
+        exec(compile(code, "<oracle-script>", "exec"), {"__name__": "__main__", "__builtins__": __builtins__})
+    except SystemExit as exc:
+        if isinstance(exc.code, int):
+            returncode = exc.code
+        elif exc.code is not None:
+            err.write(f"{exc.code}\n")
+            returncode = 1
+    except BaseException:
+        traceback.print_exc()
+        returncode = 1
+    finally:
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+    body = json.dumps({"stdout": out.value(), "stderr": err.value(), "returncode": returncode}).encode()
+    _out.write(b"%d\n" % len(body))
+    _out.write(body)
+    _out.flush()
+'''
+
+
+class PythonWorkerPool:
+    """
+    Reusable interpreters that skip CPython startup and re-imports per script.
+
+    Each script still gets a fresh globals namespace, but modules it imports stay
+    loaded in the worker for later scripts, so a script that monkeypatches a module
+    (e.g. ``requests``) affects later scripts run by that worker. A worker that
+    times out or dies is killed and replaced on next use.
+    """
+
+    def __init__(self, size: int, output_limit: int, preload: Sequence[str] = DEFAULT_PRELOAD):
+        self._size = size
+        self._output_limit = output_limit
+        self._preload = ",".join(preload)
+        self._slots = asyncio.Semaphore(size)
+        self._idle: List[asyncio.subprocess.Process] = []
+        self._busy: List[asyncio.subprocess.Process] = []
+
+    async def _spawn(self) -> asyncio.subprocess.Process:
+        return await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-I",
+            "-c",
+            _WORKER_HARNESS,
+            str(self._output_limit),
+            self._preload,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+
+    async def warm(self) -> None:
+        """Start idle workers up to the pool size so the first scripts skip interpreter startup."""
+        missing = self._size - len(self._idle) - len(self._busy)
+        if missing > 0:
+            self._idle.extend(await asyncio.gather(*(self._spawn() for _ in range(missing))))
+
+    async def run(self, code: str, timeout: float) -> Tuple[int, str, str]:
+        """Execute ``code`` in a warm worker and return (returncode, stdout, stderr)."""
+        async with self._slots:
+            proc: Optional[asyncio.subprocess.Process] = None
+            while self._idle and proc is None:
+                candidate = self._idle.pop()
+                if candidate.returncode is None:
+                    proc = candidate
+            if proc is None:
+                proc = await self._spawn()
+            self._busy.append(proc)
+            healthy = False
+            try:
+                reply = await asyncio.wait_for(self._exchange(proc, code), timeout=timeout)
+                healthy = True
+            except (asyncio.IncompleteReadError, ConnectionError, ValueError) as exc:
+                raise RuntimeError("Python worker exited unexpectedly") from exc
+            finally:
+                self._busy.remove(proc)
+                if healthy:
+                    self._idle.append(proc)
+                else:
+                    await self._kill(proc)
+
+        return int(reply["returncode"]), reply["stdout"], reply["stderr"]
+
+    @staticmethod
+    async def _exchange(proc: asyncio.subprocess.Process, code: str) -> dict:
+        data = code.encode("utf-8")
+        proc.stdin.write(b"%d\n" % len(data))
+        proc.stdin.write(data)
+        await proc.stdin.drain()
+        header = await proc.stdout.readline()
+        if not header:
+            raise asyncio.IncompleteReadError(b"", None)
+        return orjson.loads(await proc.stdout.readexactly(int(header)))
+
+    @staticmethod
+    async def _kill(proc: asyncio.subprocess.Process) -> None:
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+
+    async def close(self) -> None:
+        """Terminate every worker process."""
+        procs = self._idle + self._busy
+        self._idle = []
+        self._busy = []
+        for proc in procs:
+            await self._kill(proc)
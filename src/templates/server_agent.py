@@ -2,20 +2,145 @@
 
 import ast
 import asyncio
+import copy
+import functools
+import hashlib
+import io
 import json
 import os
+import random
 import re
-import subprocess
 import sys
-import tempfile
-from datetime import datetime
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
 import httpx
+import orjson
+from eth_utils import keccak
 from web3 import Web3
 
 from ..agent.base import AgentConfig, BaseAgent, RegistryAddresses
+from ..agent.python_worker_pool import PythonWorkerPool
+from ..utils.state import SettledIndex
+
+SCRIPT_TIMEOUT_SECONDS = 120
+# Only the tail of each stream is kept; the JSON result is printed last.
+SCRIPT_OUTPUT_LIMIT = 64 * 1024
+
+# Failure-state size above which a one-off notice is logged.
+FAILURE_STATE_WARN_SIZE = 1000
+
+# Cycles landing within this window reuse the previous "latest" block timestamp.
+BLOCK_CACHE_SECONDS = 4.0
+
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+# Sandbox replies worth waiting on before regenerating code. Transport failures (httpx
+# connect/read errors and timeouts) are classified by exception type, never by the text
+# of a script's own stderr, which may mention "connection" errors of its own.
+TRANSIENT_SANDBOX_STATUSES = frozenset({500, 502, 503, 504})
+# Failures a fresh generation cannot fix.
+FATAL_ERROR_MARKERS = ("attestation",)
+
+CAPABILITIES_WITH_AI = (
+    ("shell-execution", "Execute shell commands via AIO Sandbox"),
+    ("file-operations", "Read/write files in sandbox"),
+    ("jupyter-execution", "Run Python/Node.js code"),
+    ("ai-code-generation", "Generate and execute code from natural language with TEE attestation"),
+)
+CAPABILITIES_NO_AI = tuple(cap for cap in CAPABILITIES_WITH_AI if cap[0] != "ai-code-generation")
+
+JSON_HEADERS = {"content-type": "application/json"}
+# Failures of a sandbox call reported as {"error": ...} rather than raised: transport and
+# status errors, undecodable replies, and task input orjson cannot encode (TypeError).
+SANDBOX_CALL_ERRORS = (httpx.HTTPError, orjson.JSONDecodeError, TypeError)
+UNEXPECTED_SANDBOX_RESPONSE = "Unexpected sandbox response"
+
+# Upper bound on sub-tasks fanned out by one "batch" task.
+MAX_BATCH_TASKS = 32
+
+# Sandbox POSTs are retried only when the request cannot have reached the sandbox
+# (connect failures, 503 Service Unavailable), so code is never run twice. 502/504 are
+# not retried: the gateway may already have forwarded the request.
+SANDBOX_POST_ATTEMPTS = 3
+SANDBOX_RETRY_BASE_DELAY = 0.1
+SANDBOX_RETRY_MAX_DELAY = 2.0
+SANDBOX_RETRY_STATUSES = frozenset({503})
+
+# Long hex literals (addresses, hashes) are swapped for placeholder tokens before prompting.
+HEX_LITERAL_RE = re.compile(r"0x[0-9a-fA-F]{32,}")
+PLACEHOLDER_TOKEN_RE = re.compile(r"__PLACEHOLDER_HEX_\d+__")
+# Ancillary text mentioning a point in time; scripts for such questions depend on the request timestamp.
+TIME_REFERENCE_RE = re.compile(r"\b(?:timestamp|time|date|deadline|before|after|until)\b", re.IGNORECASE)
+
+# Per-stream cap on text collected from Jupyter outputs.
+JUPYTER_STREAM_LIMIT = 1 << 20
+TRUNCATION_MARKER = "...[truncated]"
+
+# Prefix marking the result line in script stdout, so it is found without parsing log lines.
+RESULT_SENTINEL = "##ORACLE_RESULT##"
+
+# Fixed instructions for script generation; only placeholders and the question vary.
+RESOLUTION_PROMPT_RULES = "\n".join([
+    "You are writing a Python script that resolves an oracle question.",
+    "Follow these rules carefully:",
+    "1. Determine whether the answer should be YES or NO.",
+    "2. When the question references a data source (URL, API, dataset), download it using the 'requests' library and parse the relevant value (JSON/CSV as appropriate).",
+    "3. Always guard against HTTP/network errors: retry once if the request fails, and return a NO decision with a clear reason when data cannot be retrieved or parsed.",
+    "4. Define a function `resolve_oracle()` that returns a dict with keys:",
+    "   - decision: 'YES' or 'NO'",
+    "   - reason: short human-readable explanation",
+    "   - data: optional supporting values (e.g. fetched price)",
+    "5. KEEP EVERY STRING LITERAL (ESPECIALLY URLs) ON A SINGLE LINE AND WRAP IT IN DOUBLE QUOTES.",
+    "6. NEVER break URLs across lines.",
+    "7. If the question provides a numeric threshold (e.g. 'above 110570'), convert it to float and compare against the observed value. Equality counts as meeting the threshold when the question asks 'above' or 'at or above'.",
+    "8. The DiaData API may return `Price` (capitalized) and `Time` (ISO string). Inspect the JSON keys case-insensitively: look for `price` or `Price`, and if `timestamp` is missing use `Time` by parsing ISO 8601 with `datetime.fromisoformat(time_str.replace('Z', '+00:00'))`. Always convert the timestamp to an integer UNIX epoch via `.timestamp()` before casting to int.",
+    "9. Place all imports at the top and include `from datetime import datetime` so you can parse timestamps. Do not use modules that are not imported.",
+    "10. Default to decision 'NO' only when the evidence clearly requires it or the data source is unavailable.",
+    "11. At the bottom of the script include:",
+    "   if __name__ == \"__main__\":",
+    "       import json",
+    "       result = resolve_oracle()",
+    f"       print(\"{RESULT_SENTINEL}\" + json.dumps(result))",
+    "12. Use only standard libraries plus 'requests', 'json', 'datetime', and 'time'.",
+    "13. Output raw Python code only (no markdown fences, explanations, or JSON).",
+    "14. Do not mention any limitations or inability to access the network; assume the environment will execute the code.",
+    "15. Return complete runnable code with properly closed strings and functions.",
+])
+PLACEHOLDER_PROMPT_RULES = "\n".join([
+    "16. Use the placeholder tokens below exactly as written. Do not attempt to reconstruct or guess the underlying literal—leave each token untouched.",
+    "17. Begin your script by declaring the following module-level constants (copy these lines verbatim), then reference those constants in your code:",
+])
+PLACEHOLDER_PROMPT_FOOTER = "18. Whenever you need the literal value represented by a token, reference the corresponding constant instead of inlining the token."
+
+
+class _BoundedTextBuffer:
+    """StringIO wrapper that stops accepting text once ``limit`` characters are stored."""
+
+    def __init__(self, limit: int):
+        self._buf = io.StringIO()
+        self._remaining = limit
+        self.full = False
+
+    def write(self, text: str) -> None:
+        if self.full or not text:
+            return
+        if len(text) > self._remaining:
+            self._buf.write(text[:self._remaining])
+            self._buf.write(TRUNCATION_MARKER)
+            self._remaining = 0
+            self.full = True
+            return
+        self._buf.write(text)
+        self._remaining -= len(text)
+
+    def getvalue(self) -> str:
+        return self._buf.getvalue()
 
 
 class ServerAgent(BaseAgent):
@@ -25,19 +150,85 @@ class ServerAgent(BaseAgent):
         super().__init__(config, registries)
         self.sandbox_url = sandbox_url or os.getenv("SANDBOX_URL", "http://localhost:8080")
         print(f"📦 Sandbox: {self.sandbox_url}")
+        # Shared connection pool for all sandbox calls, created on first use; closed in aclose().
+        self._http: Optional[httpx.AsyncClient] = None
 
         self._oracle_task: Optional[asyncio.Task] = None
+        self._event_task: Optional[asyncio.Task] = None
+        # Seconds between PriceRequested filter polls that wake the watcher early; 0 disables.
+        self._event_poll_interval = float(os.getenv("ORACLE_EVENT_POLL_INTERVAL", "0"))
+        self._cycle_lock = asyncio.Lock()
+        self._max_concurrency = max(1, int(os.getenv("ORACLE_MAX_CONCURRENCY", "4")))
+        self._wake = asyncio.Event()
+        # Set by stop_oracle_worker(); the watcher exits after the cycle in progress.
+        self._stop = asyncio.Event()
+        # Upper bound on waiting for that cycle before it is cancelled outright.
+        self._stop_timeout = float(os.getenv("ORACLE_STOP_TIMEOUT", "60"))
+        self._persist_tasks: Set[asyncio.Task] = set()
+        # (monotonic fetch time, block timestamp) of the last "latest" block lookup.
+        self._block_cache: Tuple[float, int] = (0.0, 0)
+        # Seconds until the nearest pending deadline seen in the last cycle.
+        self._next_deadline_in: Optional[int] = None
+        # Blocking web3 calls and evidence writes; sized so a burst of settlements can
+        # wait on receipts in parallel. Passed explicitly by _run_blocking; the loop's default
+        # executor is left alone because aclose() shuts this pool down.
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("ORACLE_THREAD_POOL_SIZE", "16")),
+            thread_name_prefix="oracle",
+        )
         self._oracle_poll_interval = int(os.getenv("ORACLE_POLL_INTERVAL", "30"))
         self._oracle_grace_seconds = int(os.getenv("ORACLE_SETTLEMENT_GRACE_SECONDS", "0"))
         self._evidence_dir = Path(os.getenv("ORACLE_EVIDENCE_DIR", "state/evidence"))
-        self._recently_settled: Dict[str, int] = {}
-        self._failure_state: Dict[str, Dict[str, int]] = {}
+        self._evidence_per_file = os.getenv("ORACLE_EVIDENCE_PER_FILE", "0") == "1"
+        self._debug_dir = Path(os.getenv("ORACLE_DEBUG_DIR", "state/debug"))
+        self._recently_settled: Dict[bytes, int] = {}
+        self._settled_index = SettledIndex(
+            Path(os.getenv("ORACLE_SETTLED_INDEX", "state/settled_index.bin"))
+        )
+        # Per-request state is keyed by the raw 32-byte request id; hex is only for logs and files.
+        # Ordered by last failure so stale entries expire from the front.
+        self._failure_state: "OrderedDict[bytes, Dict[str, float]]" = OrderedDict()
+        self._failure_state_limit = int(os.getenv("ORACLE_FAILURE_STATE_LIMIT", "10000"))
+        self._failure_state_warned = False
         self._max_ai_failures = int(os.getenv("ORACLE_AI_MAX_FAILURES", "3"))
         self._ai_failure_backoff = int(os.getenv("ORACLE_AI_FAILURE_BACKOFF", "180"))
-        self._prepared_requests: Dict[str, Dict[str, Any]] = {}
+        self._prepared_requests: Dict[bytes, Dict[str, Any]] = {}
+        self._inflight: Dict[Tuple[str, Any], "asyncio.Future[Any]"] = {}
+        # Prepared scripts by question key (identifier + ancillary), reused for repeats of the
+        # same question by later requests within the TTL.
+        self._script_cache_ttl = int(os.getenv("ORACLE_SCRIPT_CACHE_TTL", "600"))
+        self._script_cache_size = int(os.getenv("ORACLE_SCRIPT_CACHE_SIZE", "256"))
+        self._script_cache: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._script_cache_hits = 0
+        self._script_cache_misses = 0
+        # Scripts that executed successfully are also kept on disk so restarts start warm.
+        self._script_cache_dir = Path(os.getenv("ORACLE_SCRIPT_CACHE_DIR", "state/script_cache"))
         self._max_ai_prepare_attempts = int(os.getenv("ORACLE_AI_PREPARE_ATTEMPTS", "3"))
         self._max_ai_settlement_attempts = int(os.getenv("ORACLE_AI_SETTLEMENT_ATTEMPTS", "2"))
 
+        # ISOLATED serves repeated generate-and-execute tasks from cache, OFF disables it.
+        # Off by default: a hit replays earlier execution output and attestation.
+        self._ai_cache_mode = os.getenv("AI_GENERATE_CACHE_MODE", "OFF").upper()
+        self._ai_cache_size = int(os.getenv("AI_GENERATE_CACHE_SIZE", "128"))
+        # Hits older than STALE seconds are served while a refresh runs in the background;
+        # entries older than TTL seconds are regenerated before answering.
+        self._ai_cache_stale = float(os.getenv("AI_GENERATE_CACHE_STALE", "300"))
+        self._ai_cache_ttl = float(os.getenv("AI_GENERATE_CACHE_TTL", "3600"))
+        # cache key -> (monotonic store time, response)
+        self._ai_result_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # Stale-while-revalidate refreshes still running; cancelled by aclose().
+        self._refresh_tasks: Set["asyncio.Future[Any]"] = set()
+        self._task_handlers = self._build_task_handlers()
+
+        # Warm interpreters for generated scripts; 0 keeps one isolated process per script.
+        python_workers = int(os.getenv("ORACLE_PYTHON_WORKERS", "0"))
+        self._python_pool = (
+            PythonWorkerPool(python_workers, SCRIPT_OUTPUT_LIMIT) if python_workers > 0 else None
+        )
+        # "jupyter" runs settlement scripts in one long-lived sandbox kernel instead.
+        self._script_backend = os.getenv("ORACLE_SCRIPT_BACKEND", "local").lower()
+        self._oracle_jupyter_session = f"oracle-{uuid.uuid4().hex}"
+
         # Initialize AI generator if available
         self.ai_generator = None
         try:
@@ -47,39 +238,71 @@ class ServerAgent(BaseAgent):
         except Exception as e:
             print(f"⚠️ AI Generator disabled: {e}")
 
+        # Only advertise AI capability if generator is available
+        self._capabilities = CAPABILITIES_WITH_AI if self.ai_generator else CAPABILITIES_NO_AI
+        self._agent_card_cache: Optional[Tuple[Tuple[Optional[int], bool], Dict[str, Any]]] = None
+
     async def process_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """Execute task via AIO Sandbox."""
         data = task_data.get('data', {})
         task_type = data.get('type', 'shell')
 
-        if task_type == 'shell':
-            return await self._execute_shell(data.get('command', 'echo "No command"'))
-        elif task_type == 'file_read':
-            return await self._read_file(data.get('path'))
-        elif task_type == 'file_write':
-            return await self._write_file(data.get('path'), data.get('content'))
-        elif task_type == 'jupyter':
-            return await self._execute_jupyter(
-                data.get('code', 'print("No code provided")'),
-                data.get('session_id'),
-                data.get('timeout', 30)
-            )
-        elif task_type == 'nodejs':
-            return await self._execute_nodejs(
-                data.get('code', 'console.log("No code provided")'),
-                data.get('files'),
-                data.get('timeout', 30)
-            )
-        elif task_type == 'ai_generate_and_execute':
-            return await self._ai_generate_and_execute(
-                data.get('description', 'No description provided'),
-                data.get('language', 'python'),
-                data.get('context'),
-                data.get('max_retries', 2),
-                data.get('include_attestation', True)
-            )
-        else:
+        handler = self._task_handlers.get(task_type)
+        if handler is None:
             return {"error": "Unknown task type", "type": task_type}
+        return await handler(data)
+
+    def _build_task_handlers(self) -> Dict[str, Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]]:
+        """Map task types to coroutine factories taking the task ``data`` payload."""
+        return {
+            'shell': lambda d: self._execute_shell(d.get('command', 'echo "No command"')),
+            'file_read': lambda d: self._read_file(d.get('path')),
+            'file_write': lambda d: self._write_file(d.get('path'), d.get('content')),
+            'jupyter': lambda d: self._execute_jupyter(
+                d.get('code', 'print("No code provided")'),
+                d.get('session_id'),
+                d.get('timeout', 30)
+            ),
+            'nodejs': lambda d: self._execute_nodejs(
+                d.get('code', 'console.log("No code provided")'),
+                d.get('files'),
+                d.get('timeout', 30)
+            ),
+            'ai_generate_and_execute': lambda d: self._ai_generate_and_execute(
+                d.get('description', 'No description provided'),
+                d.get('language', 'python'),
+                d.get('context'),
+                d.get('max_retries', 2),
+                d.get('include_attestation', True)
+            ),
+            'batch': lambda d: self._execute_batch(d.get('tasks', [])),
+        }
+
+    async def _execute_batch(self, tasks: Any) -> Dict[str, Any]:
+        """
+        Run independent sub-tasks concurrently over the pooled sandbox client.
+
+        Sub-tasks are ``data`` payloads for any other task type. They start together,
+        so a batch must not rely on ordering (e.g. write-then-execute of the same file).
+        Results are returned in input order; a failing sub-task yields an error entry.
+        """
+        if not isinstance(tasks, list):
+            return {"error": "Batch 'tasks' must be a list of task objects"}
+        if len(tasks) > MAX_BATCH_TASKS:
+            return {"error": f"Batch too large: {len(tasks)} tasks (max {MAX_BATCH_TASKS})"}
+        if any(not isinstance(task, dict) or task.get('type') == 'batch' for task in tasks):
+            return {"error": "Batch tasks must be objects and cannot be nested batches"}
+
+        results = await asyncio.gather(
+            *(self.process_task({'data': task}) for task in tasks),
+            return_exceptions=True,
+        )
+        return {
+            "results": [
+                {"error": str(result)} if isinstance(result, Exception) else result
+                for result in results
+            ]
+        }
 
     async def start_oracle_worker(self) -> None:
         """Launch background watcher that settles oracle requests once deadlines pass."""
@@ -88,112 +311,363 @@ class ServerAgent(BaseAgent):
             return
         if self._oracle_task and not self._oracle_task.done():
             return
+        self._stop.clear()
         self._oracle_task = asyncio.create_task(self._oracle_watch_loop(), name="oracle-settlement-loop")
         print(f"🕒 Oracle watcher started (poll interval {self._oracle_poll_interval}s)")
+        if self._python_pool is not None:
+            await self._python_pool.warm()
+        if self._event_poll_interval > 0:
+            self._event_task = asyncio.create_task(self._price_request_event_loop(), name="oracle-event-loop")
+
+    async def stop_oracle_worker(self) -> None:
+        """
+        Stop the oracle watcher, letting a cycle that is already settling finish.
+
+        Cancelling mid-cycle could abandon settle transactions between submission and
+        receipt, so the watcher is asked to exit and given ``ORACLE_STOP_TIMEOUT``
+        seconds before it is cancelled.
+        """
+        self._stop.set()
+        self._wake.set()
+        event_task, self._event_task = self._event_task, None
+        oracle_task, self._oracle_task = self._oracle_task, None
+        if event_task and not event_task.done():
+            event_task.cancel()
+            await asyncio.gather(event_task, return_exceptions=True)
+        if oracle_task and not oracle_task.done():
+            done, _ = await asyncio.wait({oracle_task}, timeout=self._stop_timeout)
+            if not done:
+                print("⚠️ Oracle watcher did not stop in time; cancelling current cycle")
+                oracle_task.cancel()
+            await asyncio.gather(oracle_task, return_exceptions=True)
+            print("🛑 Oracle watcher stopped")
+
+    async def aclose(self) -> None:
+        """Stop the oracle watcher and release pooled sandbox connections."""
+        await self.stop_oracle_worker()
+        refresh_tasks = list(self._refresh_tasks)
+        for task in refresh_tasks:
+            task.cancel()
+        if refresh_tasks:
+            await asyncio.gather(*refresh_tasks, return_exceptions=True)
+        if self._persist_tasks:
+            await asyncio.gather(*self._persist_tasks, return_exceptions=True)
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._python_pool is not None:
+            await self._python_pool.close()
+        self._executor.shutdown(wait=False)
+
+    def _client(self) -> httpx.AsyncClient:
+        """Return the pooled sandbox client, creating it inside the running loop on first use."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.sandbox_url,
+                timeout=httpx.Timeout(30.0),
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+            )
+        return self._http
 
     async def run_oracle_cycle(self, price_override: Optional[int] = None) -> List[Dict[str, Any]]:
         """Process a single oracle polling cycle."""
         return await self._process_pending_requests(price_override=price_override)
 
     async def _oracle_watch_loop(self) -> None:
-        """Continuously poll pending oracle requests and settle when ready."""
-        while True:
+        """Poll pending oracle requests and settle when ready until stop_oracle_worker() is called."""
+        process = self._process_pending_requests
+        wait_for = asyncio.wait_for
+        wake = self._wake
+        stop = self._stop
+        interval = self._oracle_poll_interval
+        while not stop.is_set():
             try:
-                await self._process_pending_requests()
+                await process()
             except Exception as exc:  # pragma: no cover - defensive logging
                 print(f"⚠️ Oracle watcher error: {exc}")
-            await asyncio.sleep(self._oracle_poll_interval)
+            # Wake early for the nearest known deadline or an explicit notify; keep the
+            # poll interval as an upper bound so new on-chain requests are still picked up.
+            timeout = interval
+            if self._next_deadline_in is not None:
+                timeout = max(1, min(interval, self._next_deadline_in))
+            try:
+                await wait_for(wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+
+    async def _price_request_event_loop(self) -> None:
+        """Poll a PriceRequested log filter and wake the watcher as soon as new requests appear."""
+        event_filter = None
+        while True:
+            await asyncio.sleep(self._event_poll_interval)
+            try:
+                if event_filter is None:
+                    event_filter = await self._run_blocking(self.oracle_client.price_requested_filter)
+                    continue
+                if await self._run_blocking(event_filter.get_new_entries):
+                    self.notify_oracle_worker()
+            except Exception as exc:
+                # Nodes drop idle filters; recreate on the next tick and rely on polling meanwhile.
+                print(f"⚠️ PriceRequested filter error: {exc}")
+                event_filter = None
+
+    def notify_oracle_worker(self) -> None:
+        """Wake the oracle watcher so it runs a cycle without waiting for the poll interval."""
+        self._wake.set()
 
     async def _process_pending_requests(self, price_override: Optional[int] = None) -> List[Dict[str, Any]]:
         if not self.oracle_client:
             return []
 
-        pending = await asyncio.to_thread(self.oracle_client.pending_requests)
+        # Overlapping cycles (startup run, watcher, HTTP trigger) would race to settle
+        # the same requests; the second caller waits and sees the first one's results.
+        async with self._cycle_lock:
+            return await self._run_pending_cycle(price_override)
+
+    async def _run_pending_cycle(self, price_override: Optional[int]) -> List[Dict[str, Any]]:
+        # Ids already settled by this worker are dropped before their per-request RPC lookup.
+        pending, now_ts = await asyncio.gather(
+            self._run_blocking(self.oracle_client.pending_requests, self._settled_index),
+            self._latest_block_timestamp(),
+        )
         if not pending:
+            self._next_deadline_in = None
             return []
 
-        latest_block = await asyncio.to_thread(self._registry_client.w3.eth.get_block, "latest")
-        now_ts = latest_block["timestamp"]
-        # Drop entries older than 5 minutes
-        expiration = now_ts - 300
-        self._recently_settled = {k: v for k, v in self._recently_settled.items() if v >= expiration}
-        results: List[Dict[str, Any]] = []
+        grace = self._oracle_grace_seconds
+        prepared = self._prepared_requests
+        self._prune_recently_settled(now_ts - 300)
 
+        candidates = []
+        next_deadline_in: Optional[int] = None
+        waiting = 0
+        monotonic_now = time.monotonic()
+        self._prune_failure_state(monotonic_now)
         for request in pending:
-            req_hex = request.request_id.hex()
+            req_id = request.request_id
             if request.settled:
-                self._prepared_requests.pop(req_hex, None)
+                prepared.pop(req_id, None)
+                self._failure_state.pop(req_id, None)
                 continue
-            if req_hex in self._recently_settled:
+
+            remaining = request.timestamp + grace - now_ts
+            if remaining > 0:
+                if next_deadline_in is None or remaining < next_deadline_in:
+                    next_deadline_in = remaining
+                # Nothing left to do before the deadline once the script is prepared
+                # (or when the operator supplies the price).
+                if price_override is not None or req_id in prepared:
+                    waiting += 1
+                    continue
+
+            if req_id in self._recently_settled:
                 continue
 
-            failure_state = self._failure_state.get(req_hex)
+            failure_state = self._failure_state.get(req_id)
             if failure_state:
                 failures = failure_state.get("count", 0)
-                last_failure = failure_state.get("last", 0)
-                if failures >= self._max_ai_failures and now_ts - last_failure < self._ai_failure_backoff:
+                last_failure = failure_state.get("last", 0.0)
+                if failures >= self._max_ai_failures and monotonic_now - last_failure < self._ai_failure_backoff:
                     continue
 
-            if price_override is None and req_hex not in self._prepared_requests:
-                prepared, _ = await self._prepare_request(request, now_ts)
-                if req_hex not in self._prepared_requests:
+            candidates.append(request)
+
+        self._next_deadline_in = next_deadline_in
+        if waiting:
+            print(f"⏳ {waiting} request(s) waiting for deadline (next in +{next_deadline_in}s)")
+        if not candidates:
+            return []
+
+        # Requests are independent: prepare, resolve and settle them concurrently,
+        # bounded so a burst does not flood the AI backend.
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        # One failing request must not abort the cycle: the lock would be released while
+        # its siblings keep settling, and the next cycle could pick them up again.
+        settled = await asyncio.gather(
+            *(self._handle_request(request, now_ts, price_override, semaphore) for request in candidates),
+            return_exceptions=True,
+        )
+        results = []
+        for request, result in zip(candidates, settled):
+            if isinstance(result, Exception):
+                print(f"⚠️ Failed to process request {request.request_id.hex()}: {result}")
+            elif result:
+                results.append(result)
+        return results
+
+    async def _handle_request(
+        self,
+        request,
+        now_ts: int,
+        price_override: Optional[int],
+        semaphore: asyncio.Semaphore,
+    ) -> Optional[Dict[str, Any]]:
+        req_id = request.request_id
+        req_hex = req_id.hex()
+        async with semaphore:
+            if price_override is None and req_id not in self._prepared_requests:
+                await self._prepare_request(request)
+                if req_id not in self._prepared_requests:
                     # Preparation failed or deferred; wait until a later cycle.
-                    continue
+                    return None
 
-            if not self._ready_to_settle(request, now_ts):
-                continue
+            if not self._ready_to_settle(request, now_ts, req_hex):
+                return None
 
             if price_override is not None:
                 price = price_override
-                evidence = self._build_manual_evidence(request, price, now_ts)
+                evidence = self._build_manual_evidence(request, price, now_ts, req_hex)
             else:
-                resolution, error = await self._resolve_request_with_ai(request, now_ts)
+                resolution, error = await self._resolve_request_with_ai(request)
                 if not resolution:
-                    continue
+                    return None
                 price = resolution["price"]
                 evidence = resolution["evidence"]
                 evidence["settledAt"] = now_ts
 
-            serialized = json.dumps(evidence, sort_keys=True)
-            evidence_hash = Web3.keccak(text=serialized)
+            return await self._settle_request(request, price, evidence, now_ts, req_hex)
 
-            print(
-                f"⚙️ Settling request {request.request_id.hex()} | "
-                f"timestamp={request.timestamp} price={price}"
-            )
-            tx_hash = await asyncio.to_thread(self.oracle_client.settle_price, request, price, evidence_hash)
-            self._recently_settled[req_hex] = now_ts
-            self._failure_state.pop(req_hex, None)
-            self._prepared_requests.pop(req_hex, None)
-            evidence["txHash"] = tx_hash
-            self._persist_evidence(request.request_id.hex(), evidence)
-            print(f"✅ Settlement submitted: tx={tx_hash}")
-            results.append(
-                {
-                    "requestId": req_hex,
-                    "timestamp": request.timestamp,
-                    "price": price,
-                    "txHash": tx_hash,
-                }
-            )
+    async def _settle_request(
+        self,
+        request,
+        price: int,
+        evidence: Dict[str, Any],
+        now_ts: int,
+        req_hex: str,
+    ) -> Optional[Dict[str, Any]]:
+        print(
+            f"⚙️ Settling request {req_hex} | "
+            f"timestamp={request.timestamp} price={price}"
+        )
+        try:
+            # orjson rejects values it cannot encode (e.g. ints wider than 64 bits).
+            evidence_hash = self._build_evidence_hash(evidence)
+            tx_hash = await self._run_blocking(self.oracle_client.settle_price, request, price, evidence_hash)
+        except Exception as exc:
+            print(f"⚠️ Settlement failed for request {req_hex}: {exc}")
+            return None
+
+        req_id = request.request_id
+        self._recently_settled[req_id] = now_ts
+        self._settled_index.add(req_id)
+        self._failure_state.pop(req_id, None)
+        self._prepared_requests.pop(req_id, None)
+        evidence["txHash"] = tx_hash
+        # Disk writes happen off the loop; aclose() waits for outstanding ones.
+        self._persist_in_background(self._persist_evidence, req_hex, evidence)
+        print(f"✅ Settlement submitted: tx={tx_hash}")
+        return {
+            "requestId": req_hex,
+            "timestamp": request.timestamp,
+            "price": price,
+            "txHash": tx_hash,
+        }
 
-        return results
+    async def _latest_block_timestamp(self) -> int:
+        """Latest block timestamp, reusing the previous lookup for BLOCK_CACHE_SECONDS."""
+        fetched_at, timestamp = self._block_cache
+        if timestamp and time.monotonic() - fetched_at < BLOCK_CACHE_SECONDS:
+            return timestamp
+        latest_block = await self._run_blocking(self._registry_client.w3.eth.get_block, "latest")
+        timestamp = latest_block["timestamp"]
+        self._block_cache = (time.monotonic(), timestamp)
+        return timestamp
+
+    async def _run_blocking(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking web3 or disk call on the oracle thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+
+    async def _coalesced(self, key: Tuple[str, Any], factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``factory()`` once per ``key``; overlapping callers await the same result."""
+        # Shield so a cancelled waiter does not cancel work others are waiting on.
+        return await asyncio.shield(self._start_coalesced(key, factory))
+
+    def _start_coalesced(self, key: Tuple[str, Any], factory: Callable[[], Awaitable[Any]]) -> "asyncio.Future[Any]":
+        """Return the in-flight run for ``key``, starting ``factory()`` if none is running."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    def _refresh_in_background(self, key: Tuple[str, Any], factory: Callable[[], Awaitable[Any]]) -> None:
+        """Start a coalesced refresh nobody awaits; aclose() cancels it if still running."""
+        task = self._start_coalesced(key, factory)
+        if task in self._refresh_tasks:
+            return
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._finish_refresh)
+
+    def _finish_refresh(self, task: "asyncio.Future[Any]") -> None:
+        self._refresh_tasks.discard(task)
+        # Retrieve the exception so a failed refresh is logged rather than reported as unretrieved.
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️ Background cache refresh failed: {task.exception()}")
+
+    @staticmethod
+    def _question_key(request) -> bytes:
+        """
+        Identify an oracle question independent of the request id that asked it.
+
+        The request timestamp is part of the prompt, so it joins the key whenever the
+        ancillary text refers to a time ("at the reported timestamp"); only questions
+        that do not are shared across timestamps. Raw ancillary bytes are hashed rather
+        than the sanitized text, because scripts embed the hex literals that sanitizing
+        replaces.
+        """
+        ancillary = request.ancillary_data or b""
+        timestamp = b""
+        if TIME_REFERENCE_RE.search(ServerAgent._decode_ancillary(ancillary)):
+            timestamp = request.timestamp.to_bytes(32, "big")
+        return keccak(request.identifier + timestamp + ancillary)
+
+    def _persist_in_background(self, fn: Callable[..., Any], *args: Any) -> None:
+        """Run a disk write on the pool without blocking the caller; aclose() waits for it."""
+        task = asyncio.create_task(self._run_blocking(fn, *args))
+        self._persist_tasks.add(task)
+        task.add_done_callback(self._persist_tasks.discard)
+
+    def _prune_failure_state(self, now: float) -> None:
+        """Forget failures older than four backoff windows; they no longer affect scheduling."""
+        expiration = now - 4 * self._ai_failure_backoff
+        failures = self._failure_state
+        while failures:
+            oldest = next(iter(failures))
+            if failures[oldest].get("last", 0.0) >= expiration:
+                break
+            del failures[oldest]
+        # Log once when the table grows past the threshold, not on every cycle while it stays there.
+        over_threshold = len(failures) > FAILURE_STATE_WARN_SIZE
+        if over_threshold and not self._failure_state_warned:
+            print(f"ℹ️ Tracking AI failure state for {len(failures)} requests")
+        self._failure_state_warned = over_threshold
+
+    def _prune_recently_settled(self, expiration: int) -> None:
+        """Drop entries settled before ``expiration``; insertion order is settlement order."""
+        while self._recently_settled:
+            oldest = next(iter(self._recently_settled))
+            if self._recently_settled[oldest] >= expiration:
+                break
+            del self._recently_settled[oldest]
 
-    def _ready_to_settle(self, request, now_ts: int) -> bool:
+    def _ready_to_settle(self, request, now_ts: int, req_hex: str) -> bool:
         deadline = request.timestamp + self._oracle_grace_seconds
         if now_ts < deadline:
             remaining = deadline - now_ts
             print(
-                f"⏳ Request {request.request_id.hex()} waiting for deadline "
+                f"⏳ Request {req_hex} waiting for deadline "
                 f"(+{remaining}s)"
             )
             return False
         return True
 
-    def _build_manual_evidence(self, request, price: int, settled_at: int) -> Dict[str, Any]:
+    def _build_manual_evidence(self, request, price: int, settled_at: int, req_hex: str) -> Dict[str, Any]:
         ancillary = self._decode_ancillary(request.ancillary_data)
         return {
-            "requestId": request.request_id.hex(),
+            "requestId": req_hex,
             "identifier": Web3.to_hex(request.identifier),
             "timestamp": request.timestamp,
             "ancillary": ancillary,
@@ -204,6 +678,12 @@ class ServerAgent(BaseAgent):
         }
 
     @staticmethod
+    def _build_evidence_hash(evidence: Dict[str, Any]) -> bytes:
+        """keccak256 over the compact, key-sorted JSON encoding of ``evidence``."""
+        return keccak(orjson.dumps(evidence, option=orjson.OPT_SORT_KEYS))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
     def _decode_ancillary(data: bytes) -> str:
         if not data:
             return ""
@@ -212,21 +692,22 @@ class ServerAgent(BaseAgent):
         except UnicodeDecodeError:
             return data.hex()
 
-    async def _resolve_request_with_ai(self, request, now_ts: int) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    async def _resolve_request_with_ai(self, request) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         if not self.ai_generator:
             return None, "AI generator unavailable"
 
-        req_hex = request.request_id.hex()
-        prepared = self._prepared_requests.get(req_hex)
+        req_id = request.request_id
+        req_hex = req_id.hex()
+        prepared = self._prepared_requests.get(req_id)
         override_context: Optional[Dict[str, Any]] = None
         attempts = 0
         last_error: Optional[str] = None
+        failed_attempts: List[Dict[str, Any]] = []
 
         while attempts < self._max_ai_settlement_attempts:
             if not prepared:
                 prepared, prep_error = await self._prepare_request(
                     request,
-                    now_ts,
                     override_context=override_context,
                     record_failure=False,
                 )
@@ -239,8 +720,10 @@ class ServerAgent(BaseAgent):
                 f"🕛 Execution window reached for request {req_hex}; "
                 f"executing prepared script (confidence: {confidence})"
             )
-            resolution, error = await self._execute_prepared_script(request, prepared)
+            resolution, error = await self._execute_prepared_script(request, prepared, req_hex, failed_attempts)
             if resolution:
+                if self._script_cache_ttl > 0:
+                    self._persist_in_background(self._save_cached_script, self._question_key(request), prepared)
                 return resolution, None
 
             last_error = error or "Execution failure"
@@ -249,18 +732,21 @@ class ServerAgent(BaseAgent):
                 "previous_code": prepared["script"],
                 "error": last_error,
             }
-            self._prepared_requests.pop(req_hex, None)
+            self._prepared_requests.pop(req_id, None)
+            # A script that failed to execute must not be handed to later repeats.
+            await self._discard_cached_script(self._question_key(request))
             prepared = None
             attempts += 1
 
+        if failed_attempts:
+            self._persist_in_background(self._persist_execution_debug, req_hex, failed_attempts)
         if last_error:
-            self._record_ai_failure(req_hex, now_ts, last_error)
+            self._record_ai_failure(req_id, last_error)
         return None, last_error
 
     async def _prepare_request(
         self,
         request,
-        now_ts: int,
         *,
         override_context: Optional[Dict[str, Any]] = None,
         record_failure: bool = True,
@@ -268,29 +754,122 @@ class ServerAgent(BaseAgent):
         if not self.ai_generator:
             return None, "AI generator unavailable"
 
-        req_hex = request.request_id.hex()
-        if req_hex in self._prepared_requests and not override_context:
-            return self._prepared_requests[req_hex], None
+        req_id = request.request_id
+        if req_id in self._prepared_requests and not override_context:
+            return self._prepared_requests[req_id], None
+        req_hex = req_id.hex()
+
+        if override_context:
+            prepared, last_error = await self._generate_prepared_script(request, req_hex, override_context)
+        else:
+            question_key = self._question_key(request)
+            prepared = self._cached_script(question_key)
+            last_error = None
+            if prepared is None and self._script_cache_ttl > 0:
+                prepared = await self._run_blocking(self._load_cached_script, question_key)
+                if prepared:
+                    print(f"♻️ Loaded prepared script for request {req_hex} from disk cache")
+                    self._store_cached_script(question_key, prepared)
+            if prepared is None:
+                # Distinct requests with the same identifier and ancillary data share one
+                # generation when they overlap.
+                prepared, last_error = await self._coalesced(
+                    ("prepare", question_key),
+                    lambda: self._generate_prepared_script(request, req_hex, None),
+                )
+                if prepared:
+                    self._store_cached_script(question_key, prepared)
+
+        if prepared:
+            self._prepared_requests[req_id] = prepared
+            print(f"✅ Prepared script for request {req_hex} (confidence: {prepared['confidence']})")
+            if record_failure:
+                self._failure_state.pop(req_id, None)
+            return prepared, None
+
+        if record_failure and last_error:
+            self._record_ai_failure(req_id, last_error)
+        return None, last_error
+
+    def _cached_script(self, question_key: bytes) -> Optional[Dict[str, Any]]:
+        entry = self._script_cache.get(question_key)
+        if entry is not None and time.monotonic() - entry[0] < self._script_cache_ttl:
+            self._script_cache.move_to_end(question_key)
+            self._script_cache_hits += 1
+            total = self._script_cache_hits + self._script_cache_misses
+            print(f"♻️ Reusing prepared script (cache hit rate {self._script_cache_hits}/{total})")
+            return entry[1]
+        if entry is not None:
+            del self._script_cache[question_key]
+        self._script_cache_misses += 1
+        return None
+
+    def _store_cached_script(self, question_key: bytes, prepared: Dict[str, Any]) -> None:
+        if self._script_cache_size <= 0 or self._script_cache_ttl <= 0:
+            return
+        self._script_cache[question_key] = (time.monotonic(), prepared)
+        self._script_cache.move_to_end(question_key)
+        while len(self._script_cache) > self._script_cache_size:
+            self._script_cache.popitem(last=False)
 
+    def _cached_script_path(self, question_key: bytes) -> Path:
+        return self._script_cache_dir / f"{question_key.hex()}.json"
+
+    def _load_cached_script(self, question_key: bytes) -> Optional[Dict[str, Any]]:
+        path = self._cached_script_path(question_key)
+        try:
+            if time.time() - path.stat().st_mtime >= self._script_cache_ttl:
+                return None
+            return orjson.loads(path.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+
+    def _save_cached_script(self, question_key: bytes, prepared: Dict[str, Any]) -> None:
+        path = self._cached_script_path(question_key)
+        try:
+            self._script_cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            tmp_path.write_bytes(orjson.dumps(prepared))
+            os.replace(tmp_path, path)
+        except Exception as exc:
+            print(f"⚠️ Failed to cache prepared script {path.name}: {exc}")
+
+    async def _discard_cached_script(self, question_key: bytes) -> None:
+        self._script_cache.pop(question_key, None)
+        if self._script_cache_ttl > 0:
+            await self._run_blocking(self._unlink_cached_script, question_key)
+
+    def _unlink_cached_script(self, question_key: bytes) -> None:
+        try:
+            self._cached_script_path(question_key).unlink()
+        except OSError:
+            pass
+
+    async def _generate_prepared_script(
+        self,
+        request,
+        req_hex: str,
+        override_context: Optional[Dict[str, Any]],
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         ancillary_text = self._decode_ancillary(request.ancillary_data)
         sanitized_ancillary, placeholders = self._sanitize_ancillary(ancillary_text)
         task = self._build_resolution_task(sanitized_ancillary, placeholders)
+        identifier_hex = Web3.to_hex(request.identifier)
 
-        base_context: Dict[str, Any] = {
+        context: Dict[str, Any] = {
             "request": {
                 "requestId": req_hex,
-                "identifier": Web3.to_hex(request.identifier),
+                "identifier": identifier_hex,
                 "timestamp": request.timestamp,
                 "ancillary": sanitized_ancillary,
             }
         }
         if placeholders:
-            base_context["placeholders"] = [
+            context["placeholders"] = [
                 {"token": token, "description": meta["description"], "const": meta["const"]}
                 for token, meta in placeholders.items()
             ]
 
-        context = {**base_context}
         if override_context:
             context.update(override_context)
 
@@ -327,20 +906,17 @@ class ServerAgent(BaseAgent):
                     "analysis": analysis,
                     "confidence": confidence,
                     "ancillary": ancillary_text,
-                    "preparedAt": datetime.utcnow().isoformat(),
+                    "identifier": identifier_hex,
+                    "preparedAt": datetime.now(timezone.utc).isoformat(),
                 }
-                self._prepared_requests[req_hex] = prepared_payload
-                print(f"✅ Prepared script for request {req_hex} (confidence: {confidence})")
-                if record_failure:
-                    self._failure_state.pop(req_hex, None)
                 return prepared_payload, None
 
             last_error = "; ".join(analysis["issues"]) or "Analysis failed"
-            context = {**base_context, "previous_code": restored_code, "error": last_error}
+            # Reuse the context dict across attempts; retries only swap in the failed code.
+            context["previous_code"] = restored_code
+            context["error"] = last_error
             attempts += 1
 
-        if record_failure and last_error:
-            self._record_ai_failure(req_hex, now_ts, last_error)
         return None, last_error
 
     def _analyze_script(self, code: str) -> Dict[str, Any]:
@@ -423,17 +999,19 @@ class ServerAgent(BaseAgent):
         self,
         request,
         prepared: Dict[str, Any],
+        req_hex: str,
+        failed_attempts: List[Dict[str, Any]],
     ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         code = prepared["script"]
-        req_hex = request.request_id.hex()
-        execution = self._execute_generated_python(code)
+        # Identical prepared scripts (shared by duplicate questions) run once.
+        execution = await self._coalesced(("execute", code), lambda: self._execute_generated_python(code))
 
         if execution["success"]:
             decision = execution["decision"]
             price = 1 if decision == "YES" else 0
             evidence: Dict[str, Any] = {
                 "requestId": req_hex,
-                "identifier": Web3.to_hex(request.identifier),
+                "identifier": prepared["identifier"],
                 "timestamp": request.timestamp,
                 "ancillary": prepared.get("ancillary"),
                 "decision": decision,
@@ -443,7 +1021,7 @@ class ServerAgent(BaseAgent):
                 "script": code,
                 "stdout": execution["stdout"],
                 "stderr": execution["stderr"],
-                "executedAt": datetime.utcnow().isoformat(),
+                "executedAt": datetime.now(timezone.utc).isoformat(),
                 "analysis": prepared.get("analysis"),
                 "analysisConfidence": prepared.get("confidence"),
                 "preparedAt": prepared.get("preparedAt"),
@@ -451,33 +1029,38 @@ class ServerAgent(BaseAgent):
             return {"price": price, "evidence": evidence}, None
 
         error_message = execution["stderr"] or execution["stdout"]
-        self._persist_execution_debug(req_hex, code, execution)
+        failed_attempts.append({"script": code, "stdout": execution["stdout"], "stderr": execution["stderr"]})
         return None, error_message
 
-    def _persist_execution_debug(self, request_id: str, code: str, execution: Dict[str, Any]) -> None:
+    def _persist_execution_debug(self, request_id: str, attempts: List[Dict[str, Any]]) -> None:
+        """Write every failed execution attempt for a request as one JSON bundle."""
         try:
-            debug_dir = Path(os.getenv("ORACLE_DEBUG_DIR", "state/debug"))
-            debug_dir.mkdir(parents=True, exist_ok=True)
-            timestamp_suffix = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-            base = f"{request_id}-exec-{timestamp_suffix}"
-            (debug_dir / f"{base}.py").write_text(code, encoding="utf-8")
-            if execution.get("stderr"):
-                (debug_dir / f"{base}.stderr").write_text(execution["stderr"], encoding="utf-8")
-            if execution.get("stdout"):
-                (debug_dir / f"{base}.stdout").write_text(execution["stdout"], encoding="utf-8")
+            self._debug_dir.mkdir(parents=True, exist_ok=True)
+            timestamp_suffix = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+            path = self._debug_dir / f"{request_id}-exec-{timestamp_suffix}.json"
+            # Write then rename so a crash never leaves a truncated bundle behind.
+            tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            tmp_path.write_bytes(orjson.dumps({"requestId": request_id, "attempts": attempts}, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_path, path)
         except Exception as debug_exc:
             print(f"⚠️ Failed to persist debug artifacts for request {request_id}: {debug_exc}")
 
-    def _record_ai_failure(self, request_id: str, now_ts: int, error: Optional[str]) -> None:
-        state = self._failure_state.get(request_id, {"count": 0, "last": 0})
+    def _record_ai_failure(self, request_id: bytes, error: Optional[str]) -> None:
+        # Backoff is local policy, so it runs on the local monotonic clock rather than chain time.
+        state = self._failure_state.get(request_id, {"count": 0, "last": 0.0})
         state["count"] = min(state.get("count", 0) + 1, self._max_ai_failures)
-        state["last"] = now_ts
+        state["last"] = time.monotonic()
         self._failure_state[request_id] = state
+        self._failure_state.move_to_end(request_id)
+        while len(self._failure_state) > self._failure_state_limit:
+            self._failure_state.popitem(last=False)
         summary = (error or "unknown error").strip()
-        print(f"⚠️ Skipping request {request_id} due to AI failure: {summary[:240]}")
+        print(f"⚠️ Skipping request {request_id.hex()} due to AI failure: {summary[:240]}")
 
     def _sanitize_ancillary(self, ancillary_text: str) -> Tuple[str, Dict[str, Dict[str, str]]]:
         placeholders: Dict[str, Dict[str, str]] = {}
+        if "0x" not in ancillary_text:
+            return ancillary_text, placeholders
 
         def replacement(match: re.Match) -> str:
             literal = match.group(0)
@@ -491,63 +1074,38 @@ class ServerAgent(BaseAgent):
             }
             return token
 
-        sanitized = re.sub(r"0x[0-9a-fA-F]{32,}", replacement, ancillary_text)
+        sanitized = HEX_LITERAL_RE.sub(replacement, ancillary_text)
         return sanitized, placeholders
 
     @staticmethod
     def _restore_placeholders(code: str, placeholders: Dict[str, Dict[str, str]]) -> str:
-        restored = code
-        for token, meta in placeholders.items():
-            restored = restored.replace(token, meta["value"])
-        return restored
+        if not placeholders:
+            return code
+
+        def replacement(match: re.Match) -> str:
+            meta = placeholders.get(match.group(0))
+            return meta["value"] if meta else match.group(0)
+
+        return PLACEHOLDER_TOKEN_RE.sub(replacement, code)
 
     def _build_resolution_task(
         self,
         ancillary_text: str,
         placeholders: Optional[Dict[str, Dict[str, str]]] = None
     ) -> str:
-        base = [
-            "You are writing a Python script that resolves an oracle question.",
-            "Follow these rules carefully:",
-            "1. Determine whether the answer should be YES or NO.",
-            "2. When the question references a data source (URL, API, dataset), download it using the 'requests' library and parse the relevant value (JSON/CSV as appropriate).",
-            "3. Always guard against HTTP/network errors: retry once if the request fails, and return a NO decision with a clear reason when data cannot be retrieved or parsed.",
-            "4. Define a function `resolve_oracle()` that returns a dict with keys:",
-            "   - decision: 'YES' or 'NO'",
-            "   - reason: short human-readable explanation",
-            "   - data: optional supporting values (e.g. fetched price)",
-            "5. KEEP EVERY STRING LITERAL (ESPECIALLY URLs) ON A SINGLE LINE AND WRAP IT IN DOUBLE QUOTES.",
-            "6. NEVER break URLs across lines.",
-            "7. If the question provides a numeric threshold (e.g. 'above 110570'), convert it to float and compare against the observed value. Equality counts as meeting the threshold when the question asks 'above' or 'at or above'.",
-            "8. The DiaData API may return `Price` (capitalized) and `Time` (ISO string). Inspect the JSON keys case-insensitively: look for `price` or `Price`, and if `timestamp` is missing use `Time` by parsing ISO 8601 with `datetime.fromisoformat(time_str.replace('Z', '+00:00'))`. Always convert the timestamp to an integer UNIX epoch via `.timestamp()` before casting to int.",
-            "9. Place all imports at the top and include `from datetime import datetime` so you can parse timestamps. Do not use modules that are not imported.",
-            "10. Default to decision 'NO' only when the evidence clearly requires it or the data source is unavailable.",
-            "11. At the bottom of the script include:",
-            "   if __name__ == \"__main__\":",
-            "       import json",
-            "       result = resolve_oracle()",
-            "       print(json.dumps(result))",
-            "12. Use only standard libraries plus 'requests', 'json', 'datetime', and 'time'.",
-            "13. Output raw Python code only (no markdown fences, explanations, or JSON).",
-            "14. Do not mention any limitations or inability to access the network; assume the environment will execute the code.",
-            "15. Return complete runnable code with properly closed strings and functions.",
-        ]
-
-        if placeholders:
-            base.extend([
-                "16. Use the placeholder tokens below exactly as written. Do not attempt to reconstruct or guess the underlying literal—leave each token untouched.",
-                "17. Begin your script by declaring the following module-level constants (copy these lines verbatim), then reference those constants in your code:",
-            ])
-            for token, meta in placeholders.items():
-                base.append(f"   {meta['const']} = \"{token}\"  # {meta['description']}")
-            base.append("18. Whenever you need the literal value represented by a token, reference the corresponding constant instead of inlining the token.")
+        if not placeholders:
+            return f"{RESOLUTION_PROMPT_RULES}\nOracle question:\n{ancillary_text}\n"
 
+        base = [RESOLUTION_PROMPT_RULES, PLACEHOLDER_PROMPT_RULES]
+        for token, meta in placeholders.items():
+            base.append(f"   {meta['const']} = \"{token}\"  # {meta['description']}")
+        base.append(PLACEHOLDER_PROMPT_FOOTER)
         base.append("Oracle question:")
         base.append(ancillary_text)
 
         return "\n".join(base) + "\n"
 
-    def _execute_generated_python(self, code: str) -> Dict[str, Any]:
+    async def _execute_generated_python(self, code: str) -> Dict[str, Any]:
         result: Dict[str, Any] = {
             "success": False,
             "stdout": "",
@@ -557,125 +1115,249 @@ class ServerAgent(BaseAgent):
             "data": None,
         }
 
-        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as tmp_file:
-            tmp_file.write(code)
-            script_path = tmp_file.name
-
+        if self._script_backend == "jupyter":
+            runner = self._run_jupyter_python(code)
+        elif self._python_pool is not None:
+            runner = self._python_pool.run(code, SCRIPT_TIMEOUT_SECONDS)
+        else:
+            runner = self._run_cold_python(code)
         try:
-            proc = subprocess.run(
-                [sys.executable, script_path],
-                capture_output=True,
-                text=True,
-                timeout=120,
-            )
-            result["stdout"] = proc.stdout.strip()
-            result["stderr"] = proc.stderr.strip()
-
-            if proc.returncode != 0:
-                return result
-
-            payload = self._extract_json_payload(proc.stdout)
-            if not payload:
-                return result
-
-            decision = str(payload.get("decision", "")).strip().upper()
-            if decision not in {"YES", "NO"}:
-                return result
-
-            result["decision"] = decision
-            result["reason"] = payload.get("reason")
-            result["data"] = payload.get("data")
-            result["success"] = True
-            return result
-        except subprocess.TimeoutExpired:
+            returncode, stdout, stderr = await runner
+        except asyncio.TimeoutError:
             result["stderr"] = "Execution timed out"
             return result
         except Exception as exc:
             result["stderr"] = str(exc)
             return result
+
+        result["stdout"] = stdout.strip()
+        result["stderr"] = stderr.strip()
+
+        if returncode != 0:
+            return result
+
+        payload = self._extract_json_payload(stdout)
+        if not payload:
+            return result
+
+        decision = str(payload.get("decision", "")).strip().upper()
+        if decision not in {"YES", "NO"}:
+            return result
+
+        result["decision"] = decision
+        result["reason"] = payload.get("reason")
+        result["data"] = payload.get("data")
+        result["success"] = True
+        return result
+
+    async def _run_jupyter_python(self, code: str) -> Tuple[int, str, str]:
+        """
+        Run ``code`` in the worker's sandbox kernel so imports stay warm across scripts.
+
+        Each script gets a fresh globals dict, so values such as placeholder constants
+        cannot leak from one question into the next; only ``sys.modules`` is shared.
+        """
+        session_id = self._oracle_jupyter_session
+        wrapped = f"exec(compile({code!r}, '<oracle-script>', 'exec'), {{'__name__': '__main__'}})"
+        started = time.monotonic()
+        execution = await self._execute_jupyter(wrapped, session_id=session_id, timeout=SCRIPT_TIMEOUT_SECONDS)
+        if not execution["success"] and time.monotonic() - started >= SCRIPT_TIMEOUT_SECONDS:
+            await self._reset_jupyter_session(session_id)
+        if execution["success"]:
+            return 0, execution["stdout"], execution["stderr"]
+        stderr = execution["stderr"] or execution.get("error") or "Jupyter execution failed"
+        return 1, execution["stdout"], stderr
+
+    async def _reset_jupyter_session(self, session_id: str) -> None:
+        """Interrupt a timed-out script and move later scripts to a new kernel session."""
+        print(f"⚠️ Script timed out in Jupyter session {session_id}; starting a new session")
+        # A runaway script must not block the shared session, whether or not the interrupt lands.
+        self._oracle_jupyter_session = f"oracle-{uuid.uuid4().hex}"
+        try:
+            await self._post_json("/v1/jupyter/interrupt", {"session_id": session_id}, timeout=10.0)
+        except (httpx.HTTPError, orjson.JSONDecodeError) as exc:
+            print(f"⚠️ Failed to interrupt Jupyter session {session_id}: {exc}")
+
+    async def _run_cold_python(self, code: str) -> Tuple[int, str, str]:
+        """Run ``code`` in a fresh interpreter, killing it if it outlives the script timeout."""
+        # Feed the script over stdin so no temp file is created per execution. Isolated
+        # mode (-I) keeps PYTHONPATH, user site-packages and the cwd off the script's path.
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-I",
+            "-",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, stdout, stderr, returncode = await asyncio.wait_for(
+                asyncio.gather(
+                    self._feed_stdin(proc.stdin, code),
+                    self._read_bounded(proc.stdout, SCRIPT_OUTPUT_LIMIT),
+                    self._read_bounded(proc.stderr, SCRIPT_OUTPUT_LIMIT),
+                    proc.wait(),
+                ),
+                timeout=SCRIPT_TIMEOUT_SECONDS,
+            )
         finally:
-            try:
-                os.unlink(script_path)
-            except OSError:
-                pass
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        return returncode, stdout, stderr
+
+    @staticmethod
+    async def _feed_stdin(stream: asyncio.StreamWriter, code: str) -> None:
+        try:
+            stream.write(code.encode("utf-8"))
+            await stream.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # Script exited before consuming its source; the exit status reports why.
+            pass
+        finally:
+            stream.close()
+
+    @staticmethod
+    async def _read_bounded(stream: asyncio.StreamReader, limit: int) -> str:
+        """Drain ``stream`` keeping only the trailing ``limit`` bytes."""
+        buffer = bytearray()
+        truncated = False
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                break
+            buffer += chunk
+            if len(buffer) > limit:
+                del buffer[:-limit]
+                truncated = True
+        text = buffer.decode("utf-8", errors="replace")
+        return f"{TRUNCATION_MARKER}\n{text}" if truncated else text
 
     @staticmethod
     def _extract_json_payload(stdout: str) -> Optional[Dict[str, Any]]:
-        lines = [line.strip() for line in stdout.splitlines() if line.strip()]
-        for line in reversed(lines):
-            try:
-                return json.loads(line)
-            except json.JSONDecodeError:
-                continue
+        """
+        Return the script's result object from stdout.
+
+        Uses the last RESULT_SENTINEL line when present; otherwise falls back to the
+        last line that decodes to a JSON object, scanning from the end.
+        """
+        marker = stdout.rfind(RESULT_SENTINEL)
+        if marker != -1:
+            line_end = stdout.find("\n", marker)
+            if line_end == -1:
+                line_end = len(stdout)
+            payload = ServerAgent._decode_json_object(stdout[marker + len(RESULT_SENTINEL):line_end].strip())
+            if payload is not None:
+                return payload
+
+        end = len(stdout)
+        while end > 0:
+            start = stdout.rfind("\n", 0, end) + 1
+            candidate = stdout[start:end].strip()
+            if candidate:
+                payload = ServerAgent._decode_json_object(candidate)
+                if payload is not None:
+                    return payload
+            end = start - 1
         return None
 
-    def _persist_evidence(self, request_id: str, evidence: Dict[str, Any]) -> None:
+    @staticmethod
+    def _decode_json_object(candidate: str) -> Optional[Dict[str, Any]]:
         try:
-            self._evidence_dir.mkdir(parents=True, exist_ok=True)
+            payload = orjson.loads(candidate)
+        except orjson.JSONDecodeError:
+            payload = None
+            if candidate.startswith("{"):
+                # json.dumps emits NaN/Infinity, which only the stdlib parser accepts.
+                try:
+                    payload = json.loads(candidate)
+                except json.JSONDecodeError:
+                    pass
+        return payload if isinstance(payload, dict) else None
+
+    def _persist_evidence(self, request_id: str, evidence: Dict[str, Any]) -> None:
+        if self._evidence_per_file:
             path = self._evidence_dir / f"{request_id}.json"
-            with path.open("w", encoding="utf-8") as handle:
-                json.dump(evidence, handle, indent=2)
+            data = orjson.dumps(evidence, option=orjson.OPT_INDENT_2)
+            mode = "wb"
+        else:
+            # One compact line per settlement in a daily append-only log.
+            path = self._evidence_dir / f"{datetime.now(timezone.utc):%Y-%m-%d}.ndjson"
+            data = orjson.dumps({"requestId": request_id, **evidence}) + b"\n"
+            mode = "ab"
+        try:
+            try:
+                handle = path.open(mode)
+            except FileNotFoundError:
+                self._evidence_dir.mkdir(parents=True, exist_ok=True)
+                handle = path.open(mode)
+            with handle:
+                handle.write(data)
         except Exception as exc:
             print(f"⚠️ Failed to persist evidence for {request_id}: {exc}")
 
+    async def _post_json(self, path: str, payload: Dict[str, Any], timeout: float) -> Any:
+        """POST an orjson-encoded body to the sandbox and decode the JSON reply."""
+        client = self._client()
+        body = orjson.dumps(payload)
+        for attempt in range(SANDBOX_POST_ATTEMPTS):
+            last_attempt = attempt == SANDBOX_POST_ATTEMPTS - 1
+            try:
+                resp = await client.post(path, content=body, headers=JSON_HEADERS, timeout=timeout)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if last_attempt:
+                    raise
+            else:
+                if resp.status_code not in SANDBOX_RETRY_STATUSES or last_attempt:
+                    resp.raise_for_status()
+                    return orjson.loads(resp.content)
+            # Full jitter keeps concurrent settlements from retrying in lockstep.
+            await asyncio.sleep(
+                random.uniform(0, min(SANDBOX_RETRY_MAX_DELAY, SANDBOX_RETRY_BASE_DELAY * 2 ** attempt))
+            )
+
     async def _execute_shell(self, command: str) -> Dict[str, Any]:
         """Execute shell command via sandbox."""
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.post(
-                    f"{self.sandbox_url}/v1/shell/exec",
-                    json={"command": command},
-                    timeout=30.0
-                )
-                return resp.json()
-            except Exception as e:
-                return {"error": str(e)}
+        try:
+            response = await self._post_json("/v1/shell/exec", {"command": command}, timeout=30.0)
+        except SANDBOX_CALL_ERRORS as e:
+            return {"error": str(e)}
+        return response if isinstance(response, dict) else {"error": UNEXPECTED_SANDBOX_RESPONSE}
 
     async def _read_file(self, path: str) -> Dict[str, Any]:
         """Read file via sandbox."""
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.post(
-                    f"{self.sandbox_url}/v1/file/read",
-                    json={"file": path},
-                    timeout=10.0
-                )
-                return resp.json()
-            except Exception as e:
-                return {"error": str(e)}
+        try:
+            response = await self._post_json("/v1/file/read", {"file": path}, timeout=10.0)
+        except SANDBOX_CALL_ERRORS as e:
+            return {"error": str(e)}
+        return response if isinstance(response, dict) else {"error": UNEXPECTED_SANDBOX_RESPONSE}
 
     async def _write_file(self, path: str, content: str) -> Dict[str, Any]:
         """Write file via sandbox."""
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.post(
-                    f"{self.sandbox_url}/v1/file/write",
-                    json={"file": path, "content": content},
-                    timeout=10.0
-                )
-                return resp.json()
-            except Exception as e:
-                return {"error": str(e)}
+        try:
+            response = await self._post_json("/v1/file/write", {"file": path, "content": content}, timeout=10.0)
+        except SANDBOX_CALL_ERRORS as e:
+            return {"error": str(e)}
+        return response if isinstance(response, dict) else {"error": UNEXPECTED_SANDBOX_RESPONSE}
 
     def _parse_jupyter_response(self, jupyter_result: Dict[str, Any]) -> Dict[str, Any]:
         """Parse Jupyter response into standardized format."""
         status = jupyter_result.get('status', 'error')
-        outputs = jupyter_result.get('outputs', [])
 
-        stdout_parts = []
-        stderr_parts = []
+        stdout_buf = _BoundedTextBuffer(JUPYTER_STREAM_LIMIT)
+        stderr_buf = _BoundedTextBuffer(JUPYTER_STREAM_LIMIT)
         result = None
         error_msg = None
 
-        for output in outputs:
+        for output in jupyter_result.get('outputs') or ():
             output_type = output.get('output_type')
 
             if output_type == 'stream':
-                text = output.get('text', '')
-                if output.get('name') == 'stdout':
-                    stdout_parts.append(text)
-                elif output.get('name') == 'stderr':
-                    stderr_parts.append(text)
+                name = output.get('name')
+                if name == 'stdout':
+                    stdout_buf.write(output.get('text', ''))
+                elif name == 'stderr':
+                    stderr_buf.write(output.get('text', ''))
 
             elif output_type == 'execute_result':
                 # This is the return value
@@ -684,41 +1366,48 @@ class ServerAgent(BaseAgent):
 
             elif output_type == 'error':
                 error_msg = output.get('evalue', 'Unknown error')
-                traceback = output.get('traceback', [])
-                stderr_parts.extend(traceback)
+                traceback = output.get('traceback')
+                if traceback and not stderr_buf.full:
+                    stderr_buf.write("\n".join(traceback))
 
         return {
             'success': status == 'ok',
-            'stdout': ''.join(stdout_parts),
-            'stderr': ''.join(stderr_parts),
+            'stdout': stdout_buf.getvalue(),
+            'stderr': stderr_buf.getvalue(),
             'result': result,
             'error': error_msg
         }
 
     async def _execute_jupyter(self, code: str, session_id: str = None, timeout: int = 30) -> Dict[str, Any]:
         """Execute Python code via Jupyter kernel."""
-        async with httpx.AsyncClient() as client:
-            try:
-                payload = {"code": code, "timeout": timeout}
-                if session_id:
-                    payload["session_id"] = session_id
-
-                resp = await client.post(
-                    f"{self.sandbox_url}/v1/jupyter/execute",
-                    json=payload,
-                    timeout=float(timeout + 5)  # Add buffer to HTTP timeout
-                )
-                sandbox_response = resp.json()
-
-                # Sandbox wraps response in {"success": true, "data": {...}}
-                if sandbox_response.get('success') and 'data' in sandbox_response:
-                    jupyter_result = sandbox_response['data']
-                    return self._parse_jupyter_response(jupyter_result)
-                else:
-                    error = sandbox_response.get('message', 'Unknown sandbox error')
-                    return {"success": False, "error": error, "stdout": "", "stderr": ""}
-            except Exception as e:
-                return {"success": False, "error": str(e), "stdout": "", "stderr": ""}
+        try:
+            payload = {"code": code, "timeout": timeout}
+            if session_id:
+                payload["session_id"] = session_id
+
+            sandbox_response = await self._post_json(
+                "/v1/jupyter/execute",
+                payload,
+                timeout=float(timeout + 5)  # Add buffer to HTTP timeout
+            )
+
+            if not isinstance(sandbox_response, dict):
+                return {"success": False, "error": UNEXPECTED_SANDBOX_RESPONSE, "stdout": "", "stderr": ""}
+            # Sandbox wraps response in {"success": true, "data": {...}}
+            if sandbox_response.get('success') and 'data' in sandbox_response:
+                jupyter_result = sandbox_response['data']
+                return self._parse_jupyter_response(jupyter_result)
+            else:
+                error = sandbox_response.get('message', 'Unknown sandbox error')
+                return {"success": False, "error": error, "stdout": "", "stderr": ""}
+        except SANDBOX_CALL_ERRORS as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "stdout": "",
+                "stderr": "",
+                "transient": self._is_transient_sandbox_error(e),
+            }
 
     def _parse_nodejs_response(self, nodejs_result: Dict[str, Any]) -> Dict[str, Any]:
         """Parse Node.js response into standardized format."""
@@ -735,38 +1424,51 @@ class ServerAgent(BaseAgent):
                 data = last_output.get('data', {})
                 result = data.get('text/plain', str(data))
 
+        # Same caps as Jupyter streams so oversized output is not held in the AI result cache.
+        stdout_buf = _BoundedTextBuffer(JUPYTER_STREAM_LIMIT)
+        stdout_buf.write(nodejs_result.get('stdout') or '')
+        stderr_buf = _BoundedTextBuffer(JUPYTER_STREAM_LIMIT)
+        stderr_buf.write(nodejs_result.get('stderr') or '')
+        stderr = stderr_buf.getvalue()
+
         return {
             'success': status == 'ok' and exit_code == 0,
-            'stdout': nodejs_result.get('stdout', ''),
-            'stderr': nodejs_result.get('stderr', ''),
+            'stdout': stdout_buf.getvalue(),
+            'stderr': stderr,
             'result': result,
-            'error': nodejs_result.get('stderr') if status != 'ok' else None
+            'error': (stderr or None) if status != 'ok' else None
         }
 
     async def _execute_nodejs(self, code: str, files: Dict[str, str] = None, timeout: int = 30) -> Dict[str, Any]:
         """Execute JavaScript code via Node.js."""
-        async with httpx.AsyncClient() as client:
-            try:
-                payload = {"code": code, "timeout": timeout}
-                if files:
-                    payload["files"] = files
-
-                resp = await client.post(
-                    f"{self.sandbox_url}/v1/nodejs/execute",
-                    json=payload,
-                    timeout=float(timeout + 5)  # Add buffer to HTTP timeout
-                )
-                sandbox_response = resp.json()
-
-                # Sandbox wraps response in {"success": true, "data": {...}}
-                if sandbox_response.get('success') and 'data' in sandbox_response:
-                    nodejs_result = sandbox_response['data']
-                    return self._parse_nodejs_response(nodejs_result)
-                else:
-                    error = sandbox_response.get('message', 'Unknown sandbox error')
-                    return {"success": False, "error": error, "stdout": "", "stderr": ""}
-            except Exception as e:
-                return {"success": False, "error": str(e), "stdout": "", "stderr": ""}
+        try:
+            payload = {"code": code, "timeout": timeout}
+            if files:
+                payload["files"] = files
+
+            sandbox_response = await self._post_json(
+                "/v1/nodejs/execute",
+                payload,
+                timeout=float(timeout + 5)  # Add buffer to HTTP timeout
+            )
+
+            if not isinstance(sandbox_response, dict):
+                return {"success": False, "error": UNEXPECTED_SANDBOX_RESPONSE, "stdout": "", "stderr": ""}
+            # Sandbox wraps response in {"success": true, "data": {...}}
+            if sandbox_response.get('success') and 'data' in sandbox_response:
+                nodejs_result = sandbox_response['data']
+                return self._parse_nodejs_response(nodejs_result)
+            else:
+                error = sandbox_response.get('message', 'Unknown sandbox error')
+                return {"success": False, "error": error, "stdout": "", "stderr": ""}
+        except SANDBOX_CALL_ERRORS as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "stdout": "",
+                "stderr": "",
+                "transient": self._is_transient_sandbox_error(e),
+            }
 
     async def _ai_generate_and_execute(
         self,
@@ -796,87 +1498,171 @@ class ServerAgent(BaseAgent):
                 "message": "Supported languages: python, javascript"
             }
 
-        # 1. Generate code with AI (includes TEE attestation)
-        try:
-            if language == 'python':
-                code, attestation = await self.ai_generator.generate_python_script(
-                    description, context, include_attestation
-                )
-            else:  # javascript
-                code, attestation = await self.ai_generator.generate_javascript_script(
-                    description, context, include_attestation
-                )
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "message": "AI code generation failed",
-                "language": language
-            }
+        cache_key = self._ai_cache_key(description, language, context, include_attestation)
+        if not cache_key:
+            return await self._generate_and_execute(
+                description, language, context, max_retries, include_attestation, None
+            )
 
-        # 2. Execute the generated code
+        def refresh() -> Awaitable[Dict[str, Any]]:
+            return self._generate_and_execute(
+                description, language, context, max_retries, include_attestation, cache_key
+            )
+
+        entry = self._ai_result_cache.get(cache_key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self._ai_cache_ttl:
+                self._ai_result_cache.move_to_end(cache_key)
+                if age >= self._ai_cache_stale:
+                    # Stale-while-revalidate: answer now, regenerate once in the background.
+                    self._refresh_in_background(("ai", cache_key), refresh)
+                # Deep copy so callers cannot mutate the cached entry's nested dicts.
+                response = copy.deepcopy(entry[1])
+                response["cached"] = True
+                return response
+        # Identical tasks arriving together share one generation.
+        return await self._coalesced(("ai", cache_key), refresh)
+
+    async def _generate_and_execute(
+        self,
+        description: str,
+        language: str,
+        context: Optional[Dict[str, Any]],
+        max_retries: int,
+        include_attestation: bool,
+        cache_key: Optional[str],
+    ) -> Dict[str, Any]:
+        """Generate, execute and retry with error feedback; successful results are cached under ``cache_key``."""
         if language == 'python':
-            exec_result = await self._execute_jupyter(code)
+            generate = self.ai_generator.generate_python_script
+            execute = self._execute_jupyter
         else:  # javascript
-            exec_result = await self._execute_nodejs(code)
+            generate = self.ai_generator.generate_javascript_script
+            execute = self._execute_nodejs
 
-        # 3. Check if execution succeeded
-        execution_success = exec_result.get('success', False) and not exec_result.get('error')
+        # Copied once; retry feedback is written into it between attempts.
+        generation_context: Optional[Dict[str, Any]] = dict(context) if context else None
+        attempt = 0
 
-        if execution_success:
-            return {
-                "success": True,
-                "message": "Code generated and executed successfully",
-                "language": language,
-                "generated_code": code,
-                "output": exec_result.get('stdout', ''),
-                "result": exec_result.get('result'),
-                "execution_details": {
-                    "success": True,
-                    "stdout": exec_result.get('stdout', ''),
-                    "stderr": exec_result.get('stderr', ''),
-                    "result": exec_result.get('result')
-                },
-                "attestation": attestation if include_attestation else None,
-                "retries_used": 0,
-                "verification_url": "/verify-attestation" if attestation else None
-            }
+        while True:
+            # 1. Generate code with AI; the TEE report is fetched only for the attempt
+            # that is returned, not for attempts discarded by a retry.
+            try:
+                code, attestation = await generate(
+                    description, generation_context, include_attestation, defer_attestation=True
+                )
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": str(e),
+                    "message": "AI code generation failed",
+                    "language": language
+                }
 
-        # 4. Retry with error feedback if failed
-        if max_retries > 0:
-            retry_context = {
-                **(context or {}),
-                "previous_code": code,
-                "error": exec_result.get('error', exec_result.get('stderr', 'Unknown error'))
-            }
+            # 2. Execute the generated code
+            exec_result = await execute(code)
 
-            retry_result = await self._ai_generate_and_execute(
-                description,
-                language,
-                retry_context,
-                max_retries - 1,
-                include_attestation
-            )
-
-            # Update retries_used counter
-            if retry_result.get('success'):
-                retry_result['retries_used'] = retry_result.get('retries_used', 0) + 1
-                retry_result['message'] = f"Code generated and executed successfully (after {retry_result['retries_used']} retries)"
+            # 3. Check if execution succeeded
+            if exec_result.get('success', False) and not exec_result.get('error'):
+                break
 
-            return retry_result
+            # 4. Retry with error feedback if failed
+            error = exec_result.get('error', exec_result.get('stderr', 'Unknown error'))
+            delay = self._retry_delay(exec_result, attempt)
+            if attempt >= max_retries or delay is None:
+                # Failed after all retries
+                attestation = await self.ai_generator.complete_attestation(attestation)
+                return {
+                    "success": False,
+                    "error": exec_result.get('error', exec_result.get('stderr', 'Execution failed')),
+                    "message": f"Code execution failed after {attempt + 1} attempts",
+                    "language": language,
+                    "generated_code": code,
+                    "output": exec_result.get('stderr', ''),
+                    "execution_details": exec_result,
+                    "attestation": attestation if include_attestation else None,
+                    "retries_used": attempt
+                }
 
-        # Failed after all retries
-        return {
-            "success": False,
-            "error": exec_result.get('error', exec_result.get('stderr', 'Execution failed')),
-            "message": f"Code execution failed after {max_retries + 1} attempts",
+            if generation_context is None:
+                generation_context = {}
+            generation_context["previous_code"] = code
+            generation_context["error"] = error
+            if delay:
+                await asyncio.sleep(delay)
+            attempt += 1
+
+        attestation = await self.ai_generator.complete_attestation(attestation)
+        message = "Code generated and executed successfully"
+        if attempt:
+            message = f"{message} (after {attempt} retries)"
+        response = {
+            "success": True,
+            "message": message,
             "language": language,
             "generated_code": code,
-            "output": exec_result.get('stderr', ''),
-            "execution_details": exec_result,
+            "output": exec_result.get('stdout', ''),
+            "result": exec_result.get('result'),
+            "execution_details": {
+                "success": True,
+                "stdout": exec_result.get('stdout', ''),
+                "stderr": exec_result.get('stderr', ''),
+                "result": exec_result.get('result')
+            },
             "attestation": attestation if include_attestation else None,
-            "retries_used": max_retries
+            "retries_used": attempt,
+            "verification_url": "/verify-attestation" if attestation else None
         }
+        if cache_key:
+            self._ai_result_cache[cache_key] = (time.monotonic(), copy.deepcopy(response))
+            self._ai_result_cache.move_to_end(cache_key)
+            while len(self._ai_result_cache) > self._ai_cache_size:
+                self._ai_result_cache.popitem(last=False)
+        return response
+
+    def _ai_cache_key(
+        self,
+        description: str,
+        language: str,
+        context: Optional[Dict[str, Any]],
+        include_attestation: bool,
+    ) -> Optional[str]:
+        """Content address for a generate-and-execute task, or None when caching is off."""
+        if self._ai_cache_mode != "ISOLATED" or self._ai_cache_size <= 0:
+            return None
+        try:
+            payload = orjson.dumps(
+                {"d": description, "l": language, "c": context or {}, "a": include_attestation},
+                option=orjson.OPT_SORT_KEYS,
+            )
+        except TypeError:
+            return None
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    @staticmethod
+    def _is_transient_sandbox_error(exc: Exception) -> bool:
+        """True for failures reaching the sandbox, as opposed to errors in the executed code."""
+        if isinstance(exc, httpx.TransportError):
+            return True
+        return isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code in TRANSIENT_SANDBOX_STATUSES
+
+    @staticmethod
+    def _retry_delay(execution: Dict[str, Any], attempt: int) -> Optional[float]:
+        """
+        Classify a failed execution for the retry loop.
+
+        Returns None when retrying cannot help, 0 for code errors that only need
+        feedback to the generator, and a jittered exponential delay when the
+        sandbox call itself failed transiently (flagged by the execute helpers).
+        """
+        message = str(execution.get('error') or execution.get('stderr') or "").lower()
+        if any(marker in message for marker in FATAL_ERROR_MARKERS):
+            return None
+        if execution.get('transient'):
+            delay = RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random() * 0.5)
+            return min(delay, RETRY_MAX_DELAY)
+        return 0.0
 
     def _get_verification_instructions(self) -> Dict[str, str]:
         """Get instructions for end-user verification"""
@@ -890,26 +1676,23 @@ class ServerAgent(BaseAgent):
         """Create ERC-8004 agent card."""
         from ..agent.agent_card import create_tee_agent_card
 
-        agent_address = await self._get_agent_address()
+        agent_id = self.agent_id if self.is_registered else None
+        cache_key = (agent_id, self.is_registered)
+        cached = self._agent_card_cache
+        if cached and cached[0] == cache_key:
+            return cached[1]
 
-        capabilities = [
-            ("shell-execution", "Execute shell commands via AIO Sandbox"),
-            ("file-operations", "Read/write files in sandbox"),
-            ("jupyter-execution", "Run Python/Node.js code"),
-            ("ai-code-generation", "Generate and execute code from natural language with TEE attestation")
-        ]
-
-        # Only add AI capability if generator is available
-        if not self.ai_generator:
-            capabilities = [c for c in capabilities if c[0] != "ai-code-generation"]
+        agent_address = await self._get_agent_address()
 
-        return create_tee_agent_card(
+        card = create_tee_agent_card(
             name=f"TEE Server Agent - {self.config.domain}",
             description="TEE-secured agent with AIO Sandbox integration for secure code execution",
             domain=self.config.domain,
             agent_address=agent_address,
-            agent_id=self.agent_id if self.is_registered else None,
+            agent_id=agent_id,
             signature=None,
-            capabilities=capabilities,
+            capabilities=list(self._capabilities),
             chain_id=self.config.chain_id
         )
+        self._agent_card_cache = (cache_key, card)
+        return card
@@ -5,7 +5,7 @@ from __future__ import annotations
 import os
 from typing import Dict, Optional
 
-from .contract_loader import load_broadcast, extract_contract_addresses
+from .contract_loader import BROADCAST_ENV, load_broadcast, extract_contract_addresses
 
 CONTRACT_ENV_VARS = {
     "IdentityRegistry": "IDENTITY_REGISTRY_ADDRESS",
@@ -26,10 +26,9 @@ def load_contract_addresses(broadcast_path: Optional[str] = None) -> Dict[str, s
         if value:
             resolved[env_name] = value
 
+    broadcast_path = broadcast_path or os.getenv(BROADCAST_ENV)
     if broadcast_path:
         _merge_broadcast(resolved, broadcast_path)
-    elif os.getenv("DEXA_BROADCAST_PATH"):
-        _merge_broadcast(resolved, os.getenv("DEXA_BROADCAST_PATH") or "")
 
     missing = [env for env in CONTRACT_ENV_VARS.values() if env not in resolved]
     if missing:
@@ -39,9 +38,8 @@ def load_contract_addresses(broadcast_path: Optional[str] = None) -> Dict[str, s
 
 
 def _merge_broadcast(dest: Dict[str, str], path: str) -> None:
-    broadcast = load_broadcast(path)
-    contracts = extract_contract_addresses(broadcast)
+    contracts = extract_contract_addresses(load_broadcast(path))
     for contract, env_name in CONTRACT_ENV_VARS.items():
         address = contracts.get(contract)
-        if address and env_name not in dest:
-            dest[env_name] = address
+        if address:
+            dest.setdefault(env_name, address)
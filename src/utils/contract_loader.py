@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
-import json
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+import orjson
+
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 AGENT_ROOT = PROJECT_ROOT / "erc-8004-oracle-agent-dstack"
 AGENT_DEPLOYMENTS_DIR = AGENT_ROOT / "deployments"
@@ -15,15 +17,41 @@ DEPLOYMENTS_DIR = PROJECT_ROOT / "contracts" / "deployments"
 BROADCAST_ENV = "DEXA_BROADCAST_PATH"
 DEPLOYMENT_ENV = "DEXA_DEPLOYMENT"
 DEPLOYMENT_PATH_ENV = "DEXA_DEPLOYMENT_PATH"
+# Agent-local deployments take precedence over the shared contracts repo.
+DEPLOYMENT_SEARCH_DIRS = (AGENT_DEPLOYMENTS_DIR, DEPLOYMENTS_DIR)
+# Parsed broadcast/deployment artifacts kept in memory; older versions of a changed
+# file are evicted instead of living for the rest of the process.
+ARTIFACT_CACHE_SIZE = 8
+
+
+@lru_cache(maxsize=ARTIFACT_CACHE_SIZE)
+def _read_json_cached(path: str, mtime_ns: int) -> Any:
+    # Forge broadcast artifacts run to several MB; orjson parses the raw bytes directly.
+    return orjson.loads(Path(path).read_bytes())
+
 
+def _read_json(path: Path) -> Any:
+    """
+    Parse a JSON artifact, reusing the previous parse until the file changes.
 
+    The result is shared between callers and must be treated as read-only.
+    """
+    return _read_json_cached(str(path), path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=None)
 def load_abi(name: str) -> Dict[str, Any]:
-    """Return the ABI json content for the given contract name."""
+    """
+    Return the ABI json content for the given contract name.
+
+    ABIs are static for the life of the process, so results are memoized per name
+    (``load_abi.cache_clear()`` resets them) and must not be mutated. This is their
+    only cache; the artifact cache is left to broadcast and deployment files.
+    """
     path = ABI_DIR / f"{name}.json"
     if not path.exists():
         raise FileNotFoundError(f"ABI not found for {name} at {path}")
-    with path.open("r", encoding="utf-8") as fh:
-        data = json.load(fh)
+    data = orjson.loads(path.read_bytes())
     # Flatten to actual abi payload (Forge JSON includes metadata)
     if "abi" in data:
         return data["abi"]
@@ -38,20 +66,16 @@ def load_broadcast(path: Optional[str] = None) -> Dict[str, Any]:
     broadcast_path = Path(target)
     if not broadcast_path.exists():
         raise FileNotFoundError(f"Broadcast file not found: {broadcast_path}")
-    with broadcast_path.open("r", encoding="utf-8") as fh:
-        return json.load(fh)
+    return _read_json(broadcast_path)
 
 
 def extract_contract_addresses(broadcast: Dict[str, Any]) -> Dict[str, str]:
     """Parse the broadcast JSON produced by forge script and extract deployed addresses."""
-    transactions = broadcast.get("transactions", [])
-    deployments = {}
-    for tx in transactions:
-        contract_name = tx.get("contractName")
-        address = tx.get("contractAddress")
-        if contract_name and address:
-            deployments[contract_name] = address
-    return deployments
+    return {
+        tx["contractName"]: tx["contractAddress"]
+        for tx in broadcast.get("transactions", ())
+        if tx.get("contractName") and tx.get("contractAddress")
+    }
 
 
 def _resolve_deployment_path(name: Optional[str], path: Optional[str]) -> Path:
@@ -65,10 +89,9 @@ def _resolve_deployment_path(name: Optional[str], path: Optional[str]) -> Path:
     deployment_name = name or os.getenv(DEPLOYMENT_ENV) or "base_sepolia"
     filename = deployment_name if deployment_name.endswith(".json") else f"{deployment_name}_deployment.json"
 
-    # Search agent-local deployments first, then shared contracts repo
-    for base in (AGENT_DEPLOYMENTS_DIR, DEPLOYMENTS_DIR):
+    for base in DEPLOYMENT_SEARCH_DIRS:
         candidate = base / filename
-        if candidate.exists():
+        if candidate.is_file():
             return candidate
 
     # Fall back to contracts/deployments even if missing to maintain error message upstream
@@ -80,8 +103,7 @@ def load_deployment(name: Optional[str] = None, path: Optional[str] = None) -> D
     deployment_path = _resolve_deployment_path(name, path)
     if not deployment_path.exists():
         raise FileNotFoundError(f"Deployment file not found: {deployment_path}")
-    with deployment_path.open("r", encoding="utf-8") as fh:
-        return json.load(fh)
+    return _read_json(deployment_path)
 
 
 def load_deployment_addresses(name: Optional[str] = None, path: Optional[str] = None) -> Dict[str, str]:
@@ -2,28 +2,84 @@
 
 from __future__ import annotations
 
-import json
+import mmap
 import os
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Set
+
+import orjson
 
 DEFAULT_STATE_FILE = Path("state/agent.json")
+DEFAULT_SETTLED_INDEX_FILE = Path("state/settled_index.bin")
+REQUEST_ID_SIZE = 32
 
 
 def load_agent_state(path: Path | None = None) -> Dict[str, Any]:
     file_path = path or DEFAULT_STATE_FILE
-    if not file_path.exists():
-        return {}
     try:
-        with file_path.open("r", encoding="utf-8") as fh:
-            return json.load(fh)
+        return orjson.loads(file_path.read_bytes())
     except (ValueError, OSError):
         return {}
 
 
 def save_agent_state(state: Dict[str, Any], path: Path | None = None) -> None:
     file_path = path or DEFAULT_STATE_FILE
-    if not file_path.parent.exists():
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-    with file_path.open("w", encoding="utf-8") as fh:
-        json.dump(state, fh, indent=2)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    # Write beside the target and swap it in so a crash never leaves a torn state file.
+    tmp_path = file_path.with_suffix(file_path.suffix + ".tmp")
+    tmp_path.write_bytes(orjson.dumps(state, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, file_path)
+
+
+class SettledIndex:
+    """Append-only on-disk log of settled 32-byte request ids.
+
+    Survives restarts so the oracle worker does not regenerate or re-execute
+    scripts for requests it already settled.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or DEFAULT_SETTLED_INDEX_FILE
+        self._ids: Set[bytes] = self._load(self.path)
+
+    @staticmethod
+    def _load(path: Path) -> Set[bytes]:
+        ids: Set[bytes] = set()
+        try:
+            with path.open("rb") as fh:
+                size = os.fstat(fh.fileno()).st_size
+                # Ignore a trailing partial record left by an interrupted write.
+                usable = size - size % REQUEST_ID_SIZE
+                if not usable:
+                    return ids
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    for offset in range(0, usable, REQUEST_ID_SIZE):
+                        ids.add(view[offset:offset + REQUEST_ID_SIZE])
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            print(f"⚠️ Failed to load settled index {path}: {exc}")
+        return ids
+
+    def __contains__(self, request_id: bytes) -> bool:
+        return bytes(request_id) in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, request_id: bytes) -> None:
+        rid = bytes(request_id)
+        if len(rid) != REQUEST_ID_SIZE:
+            raise ValueError(f"Request id must be {REQUEST_ID_SIZE} bytes, got {len(rid)}")
+        if rid in self._ids:
+            return
+        self._ids.add(rid)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, rid)
+            finally:
+                os.close(fd)
+        except OSError as exc:
+            print(f"⚠️ Failed to persist settled request {rid.hex()}: {exc}")
@@ -1,7 +1,8 @@
 import json
+import os
 from pathlib import Path
 
-from src.utils.contract_loader import extract_contract_addresses
+from src.utils.contract_loader import extract_contract_addresses, load_deployment
 
 
 def test_extract_contract_addresses(tmp_path: Path):
@@ -16,3 +17,15 @@ def test_extract_contract_addresses(tmp_path: Path):
     assert result["IdentityRegistry"] == "0xABC"
     assert result["TEERegistry"] == "0xDEF"
     assert "Other" in result
+
+
+def test_load_deployment_reparses_only_after_file_changes(tmp_path: Path):
+    path = tmp_path / "local_deployment.json"
+    path.write_text(json.dumps({"contracts": {"TeeOracle": "0x1"}}))
+    first = load_deployment(path=str(path))
+    assert load_deployment(path=str(path)) is first
+
+    path.write_text(json.dumps({"contracts": {"TeeOracle": "0x2"}}))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_deployment(path=str(path))["contracts"]["TeeOracle"] == "0x2"
@@ -1,22 +1,9 @@
-from typing import Any, Callable
+from types import SimpleNamespace
+from typing import Any
 
-from src.agent.oracle_client import OracleClient
-
-
-class DummyCall:
-    def __init__(self, value: Any):
-        self._value = value
-
-    def call(self) -> Any:
-        return self._value
+from web3.exceptions import BadFunctionCallOutput
 
-
-class DummyFunctions:
-    def __init__(self, response_factory: Callable[[], Any]):
-        self._response_factory = response_factory
-
-    def getRequest(self, *_args) -> DummyCall:
-        return DummyCall(self._response_factory())
+from src.agent.oracle_client import OracleClient
 
 
 def _build_request_tuple(include_resolver: bool) -> list[Any]:
@@ -39,13 +26,9 @@ def _build_request_tuple(include_resolver: bool) -> list[Any]:
 def test_fetch_request_trims_extra_field() -> None:
     client = OracleClient.__new__(OracleClient)  # type: ignore[misc]
     response = _build_request_tuple(include_resolver=True)
-    client.oracle_contract = type(
-        "DummyContract",
-        (),
-        {"functions": DummyFunctions(lambda: response)},
-    )()
+    call = SimpleNamespace(call=lambda: response)
+    client.oracle_contract = SimpleNamespace(functions=SimpleNamespace(getRequest=lambda *_: call))
     client._has_get_request = True  # type: ignore[attr-defined]
-    client._call_requests_with_fallback = lambda *_: response  # type: ignore[attr-defined]
 
     request_id = b"\x10" * 32
     result = client.fetch_request(request_id)
@@ -68,3 +51,45 @@ def test_fetch_request_uses_fallback_tuple() -> None:
     assert result.request_id == request_id
     assert result.requester == response[0]
     assert result.evidence_hash == response[8]
+
+
+def test_pending_requests_skips_known_ids() -> None:
+    client = OracleClient.__new__(OracleClient)  # type: ignore[misc]
+    known = b"\x30" * 32
+    fresh = b"\x31" * 32
+    fetched: list[bytes] = []
+    client.pending_request_ids = lambda: [known, fresh]  # type: ignore[attr-defined]
+    client.fetch_request = lambda req_id: fetched.append(req_id) or req_id  # type: ignore[attr-defined]
+
+    result = client.pending_requests(skip={known})
+
+    assert fetched == [fresh]
+    assert result == [fresh]
+
+
+def test_fetch_requests_falls_back_when_multicall_fails() -> None:
+    client = OracleClient.__new__(OracleClient)  # type: ignore[misc]
+    fetched: list[bytes] = []
+    errors = [TimeoutError("rpc timeout"), BadFunctionCallOutput("no code at address")]
+
+    def aggregate3(_calls):
+        raise errors.pop(0)
+
+    encoded = SimpleNamespace(_encode_transaction_data=lambda: "0x")
+    client.oracle_contract = SimpleNamespace(
+        address="0x4444444444444444444444444444444444444444",
+        functions=SimpleNamespace(getRequest=lambda *_: encoded),
+    )
+    client._multicall = SimpleNamespace(functions=SimpleNamespace(aggregate3=aggregate3))  # type: ignore[attr-defined]
+    client.fetch_request = lambda req_id: fetched.append(req_id) or req_id  # type: ignore[attr-defined]
+
+    ids = [b"\x40" * 32, b"\x41" * 32]
+    # A transient RPC error only affects this batch.
+    assert client.fetch_requests(ids) == ids
+    assert fetched == ids
+    assert client._multicall is not None
+
+    # Undecodable output means Multicall3 is not deployed; batching is switched off.
+    assert client.fetch_requests(ids) == ids
+    assert fetched == ids * 2
+    assert client._multicall is None
@@ -0,0 +1,57 @@
+import asyncio
+
+from src.agent.python_worker_pool import PythonWorkerPool
+
+
+def test_worker_pool_reuses_and_replaces_workers():
+    async def scenario():
+        pool = PythonWorkerPool(1, 1024)
+        try:
+            assert await pool.run("print('hello')", timeout=10) == (0, "hello\n", "")
+            worker = pool._idle[0]
+
+            returncode, _, stderr = await pool.run("raise SystemExit(3)", timeout=10)
+            assert returncode == 3 and stderr == ""
+            assert pool._idle == [worker]
+
+            try:
+                await pool.run("import time; time.sleep(5)", timeout=0.5)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                raise AssertionError("expected timeout")
+            assert pool._idle == [] and worker.returncode is not None
+
+            returncode, stdout, _ = await pool.run("print('x' * 4096)", timeout=10)
+            assert returncode == 0 and stdout.startswith("...[truncated]")
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_worker_pool_warms_and_preloads_modules():
+    async def scenario():
+        pool = PythonWorkerPool(2, 1024, preload=("decimal", "not_a_real_module"))
+        try:
+            await pool.warm()
+            assert len(pool._idle) == 2
+            returncode, stdout, _ = await pool.run("import sys; print('decimal' in sys.modules)", timeout=10)
+            assert (returncode, stdout) == (0, "True\n")
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_worker_pool_hides_protocol_pipes_from_scripts():
+    async def scenario():
+        pool = PythonWorkerPool(1, 1024)
+        try:
+            script = "import os, sys; print(repr(sys.stdin.read())); os.write(1, b'stray\\n')"
+            assert await pool.run(script, timeout=10) == (0, "''\n", "")
+            assert await pool.run("print('next')", timeout=10) == (0, "next\n", "")
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
@@ -1,5 +1,12 @@
+import asyncio
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
 from typing import Dict
 
+import httpx
+import pytest
+
 from src.templates.server_agent import ServerAgent
 
 
@@ -39,3 +46,402 @@ def test_restore_placeholders_round_trip() -> None:
 
     assert placeholder not in restored
     assert meta[placeholder]["value"] in restored
+
+
+def test_sanitize_and_restore_multiple_placeholders() -> None:
+    agent = _build_placeholder_agent()
+    first, second = "0x" + "ab" * 20, "0x" + "cd" * 20
+    sanitized, placeholders = agent._sanitize_ancillary(f"compare {first} with {second}")
+
+    code = "A = \"__PLACEHOLDER_HEX_1__\"\nB = \"__PLACEHOLDER_HEX_2__\"\nC = \"__PLACEHOLDER_HEX_10__\""
+    restored = agent._restore_placeholders(code, placeholders)
+
+    assert sanitized == "compare __PLACEHOLDER_HEX_1__ with __PLACEHOLDER_HEX_2__"
+    assert restored == f"A = \"{first}\"\nB = \"{second}\"\nC = \"__PLACEHOLDER_HEX_10__\""
+    assert agent._sanitize_ancillary("no hex here") == ("no hex here", {})
+
+
+def test_retry_delay_classifies_errors() -> None:
+    assert ServerAgent._retry_delay({"error": "SyntaxError: invalid syntax"}, 0) == 0.0
+    assert ServerAgent._retry_delay({"error": "attestation fetch failed"}, 0) is None
+    # A script's own network failure is a code error, not a sandbox outage.
+    assert ServerAgent._retry_delay({"stderr": "requests.exceptions.ConnectionError: connection refused"}, 0) == 0.0
+    first = ServerAgent._retry_delay({"error": "timed out", "transient": True}, 0)
+    assert first is not None and 1.0 <= first <= 1.5
+    assert ServerAgent._retry_delay({"error": "Server error", "transient": True}, 10) == 30.0
+
+
+def test_sandbox_transport_errors_are_marked_transient() -> None:
+    agent = _build_placeholder_agent()
+    replies = [
+        httpx.ReadTimeout("timed out"),
+        httpx.HTTPStatusError("bad gateway", request=None, response=SimpleNamespace(status_code=502)),
+        httpx.HTTPStatusError("bad request", request=None, response=SimpleNamespace(status_code=400)),
+    ]
+
+    async def post_json(path, payload, timeout):
+        raise replies.pop(0)
+
+    agent._post_json = post_json
+
+    assert [asyncio.run(agent._execute_jupyter("1"))["transient"] for _ in range(3)] == [True, True, False]
+
+
+def test_parse_jupyter_response_caps_streams(monkeypatch) -> None:
+    from src.templates import server_agent
+
+    monkeypatch.setattr(server_agent, "JUPYTER_STREAM_LIMIT", 8)
+    agent = _build_placeholder_agent()
+    parsed = agent._parse_jupyter_response(
+        {
+            "status": "error",
+            "outputs": [
+                {"output_type": "stream", "name": "stdout", "text": "hello "},
+                {"output_type": "stream", "name": "stdout", "text": "world"},
+                {"output_type": "error", "evalue": "boom", "traceback": ["Traceback", "Error"]},
+            ],
+        }
+    )
+
+    assert parsed["success"] is False
+    assert parsed["stdout"] == "hello wo...[truncated]"
+    assert parsed["stderr"] == "Tracebac...[truncated]"
+    assert parsed["error"] == "boom"
+
+    parsed = agent._parse_nodejs_response(
+        {"status": "error", "exit_code": 1, "stdout": "ok", "stderr": "ReferenceError: x"}
+    )
+    assert parsed["stdout"] == "ok"
+    assert parsed["stderr"] == parsed["error"] == "Referenc...[truncated]"
+
+
+def test_decode_ancillary_falls_back_to_hex() -> None:
+    assert ServerAgent._decode_ancillary(b"") == ""
+    assert ServerAgent._decode_ancillary(b"price above 1") == "price above 1"
+    assert ServerAgent._decode_ancillary(b"\xff\xfe") == "fffe"
+    assert ServerAgent._decode_ancillary(b"\xff\xfe") == "fffe"
+
+
+def test_extract_json_payload_uses_last_object_line() -> None:
+    stdout = 'fetching...\n{"decision": "NO"}\nlog line\n{"decision": "YES", "reason": "ok"}\n\n42\n'
+
+    payload = ServerAgent._extract_json_payload(stdout)
+
+    assert payload == {"decision": "YES", "reason": "ok"}
+    assert ServerAgent._extract_json_payload("no json here") is None
+    assert ServerAgent._extract_json_payload("") is None
+    assert ServerAgent._extract_json_payload('{"decision": "NO", "data": NaN}')["decision"] == "NO"
+
+
+def test_extract_json_payload_prefers_sentinel_line() -> None:
+    stdout = '##ORACLE_RESULT##{"decision": "YES"}\n{"decision": "NO"}\n'
+
+    assert ServerAgent._extract_json_payload(stdout) == {"decision": "YES"}
+    assert ServerAgent._extract_json_payload('##ORACLE_RESULT##oops\n{"decision": "NO"}') == {"decision": "NO"}
+
+
+def test_coalesced_shares_one_run_between_overlapping_callers() -> None:
+    agent = _build_placeholder_agent()
+    agent._inflight = {}
+    calls = []
+
+    async def work() -> str:
+        calls.append(1)
+        await asyncio.sleep(0)
+        return "done"
+
+    async def scenario():
+        results = await asyncio.gather(*(agent._coalesced(("k", 1), work) for _ in range(3)))
+        assert results == ["done"] * 3
+        assert agent._inflight == {}
+        await agent._coalesced(("k", 1), work)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_stop_oracle_worker_lets_running_cycle_finish() -> None:
+    agent = _build_placeholder_agent()
+    agent._oracle_poll_interval = 30
+    agent._next_deadline_in = None
+    agent._stop_timeout = 5
+    agent._event_task = None
+    cycles = []
+
+    async def cycle() -> list:
+        await asyncio.sleep(0.01)
+        cycles.append("settled")
+        return []
+
+    agent._process_pending_requests = cycle
+
+    async def scenario():
+        agent._wake, agent._stop = asyncio.Event(), asyncio.Event()
+        agent._oracle_task = asyncio.create_task(agent._oracle_watch_loop())
+        await asyncio.sleep(0)
+        await agent.stop_oracle_worker()
+        assert agent._oracle_task is None
+
+    asyncio.run(scenario())
+    assert cycles == ["settled"]
+
+
+def test_post_json_retries_only_unreached_sandbox_failures(monkeypatch) -> None:
+    from src.templates import server_agent
+
+    monkeypatch.setattr(server_agent, "SANDBOX_RETRY_BASE_DELAY", 0)
+    agent = _build_placeholder_agent()
+    replies = [
+        httpx.ConnectError("refused"),
+        SimpleNamespace(status_code=503),
+        SimpleNamespace(status_code=200, content=b'{"ok": true}', raise_for_status=lambda: None),
+    ]
+    posts = []
+
+    async def post(*_args, **_kwargs):
+        posts.append(1)
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    agent._client = lambda: SimpleNamespace(post=post)
+
+    assert asyncio.run(agent._post_json("/v1/shell/exec", {"command": "true"}, timeout=1.0)) == {"ok": True}
+    assert len(posts) == 3
+
+    # A gateway timeout may have reached the sandbox, so it is surfaced rather than retried.
+    def gateway_timeout():
+        raise RuntimeError("504")
+
+    replies.append(SimpleNamespace(status_code=504, raise_for_status=gateway_timeout))
+    with pytest.raises(RuntimeError):
+        asyncio.run(agent._post_json("/v1/jupyter/execute", {"code": "1"}, timeout=1.0))
+    assert len(posts) == 4
+
+
+def test_execute_batch_runs_subtasks_concurrently_in_order() -> None:
+    agent = _build_placeholder_agent()
+
+    async def handler(data):
+        # Later tasks finish first; results must still come back in input order.
+        await asyncio.sleep(0.01 * (3 - data["n"]))
+        if data["n"] == 1:
+            raise RuntimeError("boom")
+        return {"n": data["n"]}
+
+    agent._task_handlers = {"echo": handler}
+    tasks = [{"type": "echo", "n": n} for n in range(3)]
+
+    assert asyncio.run(agent._execute_batch(tasks)) == {"results": [{"n": 0}, {"error": "boom"}, {"n": 2}]}
+    nested = asyncio.run(agent._execute_batch([{"type": "batch", "tasks": tasks}]))
+    assert nested["error"].startswith("Batch tasks")
+    for malformed in (3, "shell", {"type": "echo"}, None):
+        assert "error" in asyncio.run(agent._execute_batch(malformed))
+    assert "error" in asyncio.run(agent._execute_batch(["shell"]))
+
+
+def test_settle_request_skips_unencodable_evidence() -> None:
+    agent = _build_placeholder_agent()
+    sent = []
+    agent._oracle_client = SimpleNamespace(settle_price=lambda *args: sent.append(args))
+    request = SimpleNamespace(request_id=b"\x01" * 32, timestamp=1)
+
+    # orjson only encodes 64-bit integers; the failure must be contained to this request.
+    result = asyncio.run(agent._settle_request(request, 1, {"data": 2 ** 70}, 1, "01" * 32))
+
+    assert result is None
+    assert sent == []
+
+
+def test_prepare_request_reuses_script_for_repeated_question(tmp_path) -> None:
+    agent = _build_placeholder_agent()
+    agent.ai_generator = object()
+    agent._executor = None
+    agent._inflight = {}
+    agent._prepared_requests = {}
+    agent._failure_state = OrderedDict()
+    agent._script_cache = OrderedDict()
+    agent._script_cache_ttl, agent._script_cache_size = 600, 8
+    agent._script_cache_hits = agent._script_cache_misses = 0
+    agent._script_cache_dir = tmp_path
+    generated = []
+
+    async def generate(request, req_hex, override_context):
+        generated.append(req_hex)
+        return {"script": "print(1)", "confidence": "HIGH"}, None
+
+    agent._generate_prepared_script = generate
+    # Same question asked again later by a new request.
+    first = SimpleNamespace(request_id=b"\x01" * 32, identifier=b"\x0a" * 32, timestamp=100, ancillary_data=b"q")
+    second = SimpleNamespace(request_id=b"\x02" * 32, identifier=b"\x0a" * 32, timestamp=200, ancillary_data=b"q")
+
+    async def scenario():
+        await agent._prepare_request(first)
+        await agent._prepare_request(second)
+
+    asyncio.run(scenario())
+    assert generated == ["01" * 32]
+    assert agent._prepared_requests[second.request_id]["script"] == "print(1)"
+
+
+def test_prepare_request_coalesces_overlapping_identical_questions() -> None:
+    agent = _build_placeholder_agent()
+    agent.ai_generator = object()
+    agent._inflight = {}
+    agent._prepared_requests = {}
+    agent._failure_state = OrderedDict()
+    agent._script_cache = OrderedDict()
+    agent._script_cache_ttl, agent._script_cache_size = 0, 0
+    agent._script_cache_hits = agent._script_cache_misses = 0
+    generated = []
+
+    async def generate(request, req_hex, override_context):
+        generated.append(req_hex)
+        await asyncio.sleep(0.01)
+        return {"script": "print(1)", "confidence": "HIGH"}, None
+
+    agent._generate_prepared_script = generate
+    requests = [
+        SimpleNamespace(request_id=bytes([n]) * 32, identifier=b"\x0a" * 32, timestamp=100 * n, ancillary_data=b"q")
+        for n in (1, 2, 3)
+    ]
+
+    async def scenario():
+        await asyncio.gather(*(agent._prepare_request(request) for request in requests))
+
+    asyncio.run(scenario())
+    assert len(generated) == 1
+    assert all(agent._prepared_requests[request.request_id] for request in requests)
+
+
+def test_ai_cache_hits_are_isolated_from_the_cached_entry() -> None:
+    agent = _build_placeholder_agent()
+    agent.ai_generator = object()
+    agent._inflight = {}
+    agent._ai_cache_mode, agent._ai_cache_size = "ISOLATED", 8
+    agent._ai_cache_stale, agent._ai_cache_ttl = 300.0, 3600.0
+    agent._ai_result_cache = OrderedDict()
+    key = agent._ai_cache_key("add", "python", None, True)
+    agent._ai_result_cache[key] = (time.monotonic(), {"success": True, "execution_details": {"stdout": "2"}})
+
+    first = asyncio.run(agent._ai_generate_and_execute("add", "python"))
+    first["execution_details"]["stdout"] = "mutated"
+
+    second = asyncio.run(agent._ai_generate_and_execute("add", "python"))
+    assert second == {"success": True, "execution_details": {"stdout": "2"}, "cached": True}
+
+
+def test_aclose_cancels_background_cache_refreshes() -> None:
+    agent = _build_placeholder_agent()
+    agent._inflight = {}
+    agent._refresh_tasks = set()
+    agent._persist_tasks = set()
+    agent._http = None
+    agent._python_pool = None
+    agent._executor = SimpleNamespace(shutdown=lambda wait: None)
+
+    async def stop() -> None:
+        return None
+
+    agent.stop_oracle_worker = stop
+
+    async def scenario():
+        agent._refresh_in_background(("ai", "k"), lambda: asyncio.sleep(60))
+        agent._refresh_in_background(("ai", "k"), lambda: asyncio.sleep(60))
+        (task,) = agent._refresh_tasks
+        await agent.aclose()
+        assert task.cancelled()
+        assert agent._refresh_tasks == set()
+
+    asyncio.run(scenario())
+
+
+def test_question_key_includes_timestamp_only_for_time_dependent_questions(monkeypatch) -> None:
+    from src.templates import server_agent
+
+    monkeypatch.setattr(server_agent, "keccak", lambda data: data)
+    identifier = b"\x0a" * 32
+
+    def key(ancillary: bytes, timestamp: int) -> bytes:
+        request = SimpleNamespace(identifier=identifier, timestamp=timestamp, ancillary_data=ancillary)
+        return ServerAgent._question_key(request)
+
+    assert key(b"Is ETH listed on DEX?", 1) == key(b"Is ETH listed on DEX?", 2)
+    timed = b"Is BTC above 100 at the reported timestamp?"
+    assert key(timed, 1) != key(timed, 2)
+
+
+def test_run_jupyter_python_isolates_globals_and_resets_on_timeout(monkeypatch) -> None:
+    from src.templates import server_agent
+
+    monkeypatch.setattr(server_agent, "SCRIPT_TIMEOUT_SECONDS", 0)
+    agent = _build_placeholder_agent()
+    agent._oracle_jupyter_session = "oracle-first"
+    sent = []
+    posts = []
+
+    async def execute_jupyter(code, session_id=None, timeout=30):
+        sent.append((code, session_id))
+        return {"success": False, "stdout": "", "stderr": "", "error": "timeout"}
+
+    async def post_json(path, payload, timeout):
+        posts.append((path, payload))
+        return {}
+
+    agent._execute_jupyter = execute_jupyter
+    agent._post_json = post_json
+
+    code = "print('hi')"
+    exit_code, _, _ = asyncio.run(agent._run_jupyter_python(code))
+
+    assert exit_code == 1
+    wrapped, session_id = sent[0]
+    # The script runs in its own globals dict inside the shared session.
+    assert session_id == "oracle-first"
+    assert repr(code) in wrapped and wrapped.endswith("{'__name__': '__main__'})")
+    assert posts == [("/v1/jupyter/interrupt", {"session_id": "oracle-first"})]
+    assert agent._oracle_jupyter_session != "oracle-first"
+
+
+def test_sandbox_calls_report_unencodable_input_and_non_object_replies() -> None:
+    agent = _build_placeholder_agent()
+    replies = [TypeError("Integer exceeds 64-bit range"), ["not", "an", "object"], "ok"]
+
+    async def post_json(path, payload, timeout):
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    agent._post_json = post_json
+
+    assert asyncio.run(agent._execute_shell("echo")) == {"error": "Integer exceeds 64-bit range"}
+    assert asyncio.run(agent._execute_jupyter("1"))["success"] is False
+    assert "error" in asyncio.run(agent._read_file("/tmp/x"))
+
+
+def test_persist_execution_debug_writes_complete_bundle(tmp_path) -> None:
+    agent = _build_placeholder_agent()
+    agent._debug_dir = tmp_path / "debug"
+
+    agent._persist_execution_debug("ab" * 32, [{"script": "print(1)", "stdout": "", "stderr": "boom"}])
+
+    (bundle,) = agent._debug_dir.iterdir()
+    assert bundle.suffix == ".json"
+    assert b'"stderr": "boom"' in bundle.read_bytes()
+
+
+def test_prune_failure_state_logs_size_once(monkeypatch, capsys) -> None:
+    from src.templates import server_agent
+
+    monkeypatch.setattr(server_agent, "FAILURE_STATE_WARN_SIZE", 2)
+    agent = _build_placeholder_agent()
+    agent._ai_failure_backoff = 180
+    agent._failure_state_warned = False
+    agent._failure_state = OrderedDict((bytes([n]) * 32, {"count": 1, "last": 1000.0}) for n in range(3))
+
+    for _ in range(3):
+        agent._prune_failure_state(1000.0)
+
+    assert capsys.readouterr().out.count("Tracking AI failure state") == 1
@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from src.utils.state import load_agent_state, save_agent_state
+from src.utils.state import SettledIndex, load_agent_state, save_agent_state
 
 
 def test_state_roundtrip(tmp_path: Path):
@@ -8,3 +8,17 @@ def test_state_roundtrip(tmp_path: Path):
     assert load_agent_state(state_file) == {}
     save_agent_state({"agent_id": 5}, state_file)
     assert load_agent_state(state_file)["agent_id"] == 5
+
+
+def test_settled_index_survives_reload(tmp_path: Path):
+    index_file = tmp_path / "settled_index.bin"
+    index = SettledIndex(index_file)
+    request_id = b"\x11" * 32
+    assert request_id not in index
+    index.add(request_id)
+    index.add(request_id)
+    assert index_file.stat().st_size == 32
+
+    reloaded = SettledIndex(index_file)
+    assert request_id in reloaded
+    assert len(reloaded) == 1
@@ -0,0 +1,60 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from verify_ai_attestation import AIAttestationVerifier
+
+
+def _attestation(**overrides):
+    att = {
+        "type": "intel_tdx",
+        "measurements": {},
+        "signature": "sig",
+        "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "nonce": "ab" * 32,
+    }
+    att.update(overrides)
+    return att
+
+
+def test_verify_attestation_checks_nonce_and_freshness() -> None:
+    verifier = AIAttestationVerifier()
+    assert verifier.verify_attestation(_attestation())
+    assert verifier.nonce_bytes == b"\xab" * 32
+
+    stale = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+    assert not AIAttestationVerifier().verify_attestation(_attestation(timestamp=stale))
+
+    verifier = AIAttestationVerifier()
+    assert verifier.verify_attestation(_attestation(nonce="zz" * 32))
+    assert verifier.nonce_bytes is None
+    assert any("nonce" in warning.lower() for warning in verifier.warnings)
+
+
+def test_verify_many_hashes_code_files(tmp_path: Path) -> None:
+    code = tmp_path / "script.py"
+    code.write_bytes(b"print('ok')\n")
+    expected = hashlib.sha256(b"print('ok')\n").hexdigest()
+    verifier = AIAttestationVerifier()
+
+    results, code_results = verifier.verify_many(
+        [_attestation(), {"type": "intel_tdx"}],
+        [(str(code), expected), (str(code), "0" * 64)],
+    )
+
+    assert [result["ok"] for result in results] == [True, False]
+    assert results[1]["errors"] and not results[0]["errors"]
+    assert code_results == [True, False]
+    assert verifier.errors[0].startswith("[1] Missing required fields")
+
+
+def test_verify_code_file_accepts_crlf_copies(tmp_path: Path) -> None:
+    # Pad so a CRLF pair straddles the 1 MiB read boundary.
+    code = "x" * ((1 << 20) - 1) + "\nprint('ok')\n"
+    expected = hashlib.sha256(code.encode()).hexdigest()
+    path = tmp_path / "generated.py"
+    path.write_bytes(code.replace("\n", "\r\n").encode())
+
+    verifier = AIAttestationVerifier(quiet=True)
+    assert verifier.verify_code_file(str(path), expected)
+    assert verifier.errors == []
@@ -7,6 +7,7 @@ Users can independently verify cryptographic proofs without trusting the agent.
 
 Usage:
     python verify_ai_attestation.py <attestation_file.json>
+    python verify_ai_attestation.py <attestation_file.json> [<attestation_file.json> ...]
     python verify_ai_attestation.py --from-api <request_id>
 """
 
@@ -14,37 +15,78 @@ import json
 import sys
 import argparse
 import hashlib
-import base64
-from datetime import datetime, timedelta
-from typing import Dict, Any
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 
 try:
-    import requests
-    from cryptography import x509
-    from cryptography.hazmat.backends import default_backend
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.primitives.asymmetric import ec
-except ImportError:
-    print("Missing dependencies. Install with:")
-    print("  pip install cryptography requests")
-    sys.exit(1)
+    import orjson
+except ImportError:  # optional: only speeds up loading large attestation files
+    orjson = None
+
+
+VALID_TEE_TYPES = frozenset({
+    "nvidia_h100_tee",
+    "nvidia_h100_confidential_compute",
+    "intel_sgx",
+    "intel_tdx",
+    "amd_sev",
+})
+REQUIRED_FIELDS = ("type", "measurements", "signature", "timestamp")
+
+
+def _load_json_file(path: str) -> Any:
+    """Parse a JSON file from its raw bytes, with orjson when it is installed"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _file_sha256(path: str) -> str:
+    """
+    SHA-256 hex digest of a code file, read in chunks.
+
+    Line endings are normalized to LF as text-mode reading does, since
+    response_hash covers the generated text rather than the bytes on disk
+    (a copy saved with CRLF endings must still verify).
+    """
+    digest = hashlib.sha256()
+    pending = b""
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            chunk = pending + chunk
+            # Hold back a trailing CR in case the next chunk starts with LF
+            pending = chunk[-1:] if chunk.endswith(b"\r") else b""
+            if pending:
+                chunk = chunk[:-1]
+            digest.update(chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n"))
+    digest.update(pending.replace(b"\r", b"\n"))
+    return digest.hexdigest()
 
 
 class AIAttestationVerifier:
     """Verify TEE attestation for AI-generated code"""
 
-    def __init__(self):
+    # Attestations older than this are reported as stale
+    MAX_AGE = timedelta(minutes=10)
+
+    def __init__(self, quiet: bool = False):
+        # quiet suppresses progress output; results stay on errors/warnings
+        self.quiet = quiet
         self.errors = []
         self.warnings = []
+        # Decoded 32-byte nonce of the last attestation checked, for binding checks
+        self.nonce_bytes: Optional[bytes] = None
 
     def verify_attestation(self, attestation_data: Dict[str, Any]) -> bool:
         """
         Main verification method.
         Returns True if all checks pass, False otherwise.
         """
-        print("=" * 70)
-        print("AI Attestation Verification")
-        print("=" * 70)
+        self._emit("=" * 70)
+        self._emit("AI Attestation Verification")
+        self._emit("=" * 70)
 
         # Extract nested attestation if present
         if "attestation" in attestation_data and isinstance(attestation_data["attestation"], dict):
@@ -56,18 +98,28 @@ class AIAttestationVerifier:
         if not self._verify_structure(att):
             return False
 
+        # Read the checked fields once and hand them to the individual checks
+        nonce = att.get("nonce")
+        timestamp_str = att.get("timestamp")
+        tee_type = att.get("type")
+
         # 2. Verify nonce (prevents replay attacks)
-        if not self._verify_nonce(att):
+        if not self._verify_nonce(nonce):
             self.warnings.append("Nonce verification skipped or failed")
 
         # 3. Verify timestamp freshness
-        if not self._verify_timestamp(att):
+        if not self._verify_timestamp(timestamp_str):
             return False
 
         # 4. Verify TEE type
-        if not self._verify_tee_type(att):
+        if not self._verify_tee_type(tee_type):
             return False
 
+        ok = len(self.errors) == 0
+        if self.quiet:
+            # Steps 5-6 and the summary only produce output
+            return ok
+
         # 5. Verify model integrity (if available)
         if "inference" in attestation_data:
             self._verify_inference_data(attestation_data["inference"])
@@ -77,155 +129,193 @@ class AIAttestationVerifier:
             self._display_verification_metadata(attestation_data["verification"])
 
         # Print summary
-        print("\n" + "=" * 70)
+        self._emit("\n" + "=" * 70)
         if self.errors:
-            print("❌ VERIFICATION FAILED")
-            print("\nErrors:")
+            self._emit("❌ VERIFICATION FAILED")
+            self._emit("\nErrors:")
             for error in self.errors:
-                print(f"  - {error}")
+                self._emit("  - %s", error)
         else:
-            print("✅ VERIFICATION PASSED")
+            self._emit("✅ VERIFICATION PASSED")
 
         if self.warnings:
-            print("\nWarnings:")
+            self._emit("\nWarnings:")
             for warning in self.warnings:
-                print(f"  ⚠️  {warning}")
+                self._emit("  ⚠️  %s", warning)
+
+        self._emit("=" * 70)
 
-        print("=" * 70)
+        return ok
 
-        return len(self.errors) == 0
+    def _emit(self, message: str = "", *args: Any) -> None:
+        """Print progress output; ``message % args`` is only formatted when not quiet"""
+        if not self.quiet:
+            print(message % args if args else message)
 
     def _verify_structure(self, att: Dict[str, Any]) -> bool:
         """Verify attestation has required fields"""
-        print("\n1. Verifying attestation structure...")
+        self._emit("\n1. Verifying attestation structure...")
 
-        required_fields = ["type", "measurements", "signature", "timestamp"]
-        missing = [f for f in required_fields if f not in att]
+        missing = [f for f in REQUIRED_FIELDS if f not in att]
 
         if missing:
             self.errors.append(f"Missing required fields: {missing}")
-            print(f"  ❌ Missing fields: {missing}")
+            self._emit("  ❌ Missing fields: %s", missing)
             return False
 
-        print("  ✓ All required fields present")
+        self._emit("  ✓ All required fields present")
         return True
 
-    def _verify_nonce(self, att: Dict[str, Any]) -> bool:
+    def _verify_nonce(self, nonce: Any) -> bool:
         """Verify nonce to prevent replay attacks"""
-        print("\n2. Verifying nonce (replay attack prevention)...")
+        self._emit("\n2. Verifying nonce (replay attack prevention)...")
 
-        nonce = att.get("nonce")
+        self.nonce_bytes = None
         if not nonce:
             self.warnings.append("No nonce found in attestation")
-            print("  ⚠️  No nonce found")
+            self._emit("  ⚠️  No nonce found")
             return False
 
-        # Check nonce format (should be 64 hex characters)
-        if not isinstance(nonce, str) or len(nonce) != 64:
+        # Nonce should be 32 bytes, hex encoded
+        try:
+            nonce_bytes = bytes.fromhex(nonce) if isinstance(nonce, str) else b""
+        except ValueError:
+            nonce_bytes = b""
+        if len(nonce_bytes) != 32:
             self.warnings.append(f"Invalid nonce format: {nonce}")
-            print(f"  ⚠️  Invalid nonce format")
+            self._emit("  ⚠️  Invalid nonce format")
             return False
+        self.nonce_bytes = nonce_bytes
 
-        print(f"  ✓ Nonce present: {nonce[:16]}...")
+        self._emit("  ✓ Nonce present: %.16s...", nonce)
         return True
 
-    def _verify_timestamp(self, att: Dict[str, Any]) -> bool:
+    def _verify_timestamp(self, timestamp_str: Any) -> bool:
         """Verify attestation is recent (not too old)"""
-        print("\n3. Verifying timestamp freshness...")
+        self._emit("\n3. Verifying timestamp freshness...")
 
-        timestamp_str = att.get("timestamp")
         if not timestamp_str:
             self.errors.append("No timestamp found")
-            print("  ❌ No timestamp")
+            self._emit("  ❌ No timestamp")
             return False
 
         try:
-            # Parse timestamp
-            timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            age = datetime.utcnow() - timestamp.replace(tzinfo=None)
+            # Parse timestamp (fromisoformat only accepts a trailing Z from Python 3.11)
+            iso = timestamp_str[:-1] + '+00:00' if timestamp_str.endswith('Z') else timestamp_str
+            timestamp = datetime.fromisoformat(iso)
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            age = datetime.now(timezone.utc) - timestamp
 
-            print(f"  ✓ Timestamp: {timestamp_str}")
-            print(f"  ✓ Age: {age.total_seconds():.1f} seconds")
+            self._emit("  ✓ Timestamp: %s", timestamp_str)
+            self._emit("  ✓ Age: %.1f seconds", age.total_seconds())
 
-            # Check if too old (default: 10 minutes)
-            max_age = timedelta(minutes=10)
+            max_age = self.MAX_AGE
             if age > max_age:
                 self.warnings.append(
                     f"Attestation is old: {age.total_seconds()/60:.1f} minutes "
                     f"(max: {max_age.total_seconds()/60} minutes)"
                 )
-                print(f"  ⚠️  Attestation is old")
+                self._emit("  ⚠️  Attestation is old")
                 return False
 
             return True
         except Exception as e:
             self.errors.append(f"Invalid timestamp: {e}")
-            print(f"  ❌ Invalid timestamp: {e}")
+            self._emit("  ❌ Invalid timestamp: %s", e)
             return False
 
-    def _verify_tee_type(self, att: Dict[str, Any]) -> bool:
+    def _verify_tee_type(self, tee_type: Any) -> bool:
         """Verify TEE technology type"""
-        print("\n4. Verifying TEE type...")
+        self._emit("\n4. Verifying TEE type...")
 
-        tee_type = att.get("type")
         if not tee_type:
             self.errors.append("No TEE type specified")
-            print("  ❌ No TEE type")
+            self._emit("  ❌ No TEE type")
             return False
 
-        valid_types = [
-            "nvidia_h100_tee",
-            "nvidia_h100_confidential_compute",
-            "intel_sgx",
-            "intel_tdx",
-            "amd_sev"
-        ]
-
-        if tee_type not in valid_types:
+        if tee_type not in VALID_TEE_TYPES:
             self.warnings.append(f"Unknown TEE type: {tee_type}")
-            print(f"  ⚠️  Unknown TEE type: {tee_type}")
+            self._emit("  ⚠️  Unknown TEE type: %s", tee_type)
 
-        print(f"  ✓ TEE Type: {tee_type}")
+        self._emit("  ✓ TEE Type: %s", tee_type)
         return True
 
     def _verify_inference_data(self, inference: Dict[str, Any]):
         """Verify inference metadata"""
-        print("\n5. Verifying inference data...")
+        self._emit("\n5. Verifying inference data...")
 
         model = inference.get("model")
         prompt_hash = inference.get("prompt_hash")
         response_hash = inference.get("response_hash")
 
         if model:
-            print(f"  ✓ Model: {model}")
+            self._emit("  ✓ Model: %s", model)
 
         if prompt_hash:
-            print(f"  ✓ Prompt hash: {prompt_hash[:16]}...")
+            self._emit("  ✓ Prompt hash: %.16s...", prompt_hash)
 
         if response_hash:
-            print(f"  ✓ Response hash: {response_hash[:16]}...")
+            self._emit("  ✓ Response hash: %.16s...", response_hash)
 
         usage = inference.get("usage")
         if usage:
-            print(f"  ✓ Token usage: {usage}")
+            self._emit("  ✓ Token usage: %s", usage)
 
     def _display_verification_metadata(self, verification: Dict[str, Any]):
         """Display verification metadata"""
-        print("\n6. Verification metadata:")
+        self._emit("\n6. Verification metadata:")
 
         nonce = verification.get("nonce")
         fetched_at = verification.get("fetched_at")
 
         if nonce:
-            print(f"  • Nonce: {nonce[:16]}...")
+            self._emit("  • Nonce: %.16s...", nonce)
 
         if fetched_at:
-            print(f"  • Fetched: {fetched_at}")
+            self._emit("  • Fetched: %s", fetched_at)
 
     def verify_code_hash(self, code: str, expected_hash: str) -> bool:
         """Verify generated code matches expected hash"""
-        actual_hash = hashlib.sha256(code.encode()).hexdigest()
+        return self._check_code_hash(hashlib.sha256(code.encode()).hexdigest(), expected_hash)
+
+    def verify_code_file(self, code_path: str, expected_hash: str) -> bool:
+        """Verify a saved code file matches expected hash, hashing it in chunks"""
+        return self._check_code_hash(_file_sha256(code_path), expected_hash)
+
+    def verify_many(
+        self,
+        attestations: Sequence[Dict[str, Any]],
+        code_files: Sequence[Tuple[str, str]] = (),
+        max_workers: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[bool]]:
+        """
+        Verify a batch of attestations and (code_path, expected_hash) pairs.
 
+        Each attestation is checked quietly and independently, yielding an
+        {"ok", "errors", "warnings"} record; errors are also collected on this
+        verifier prefixed with the item index. Code files are hashed in a thread
+        pool, since hashlib releases the GIL while digesting.
+        """
+        results = []
+        for index, attestation in enumerate(attestations):
+            item = type(self)(quiet=True)
+            ok = item.verify_attestation(attestation)
+            results.append({"ok": ok, "errors": item.errors, "warnings": item.warnings})
+            self.errors.extend(f"[{index}] {error}" for error in item.errors)
+            self.warnings.extend(f"[{index}] {warning}" for warning in item.warnings)
+
+        code_results = []
+        if code_files:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                digests = list(pool.map(_file_sha256, (path for path, _ in code_files)))
+            code_results = [
+                self._check_code_hash(digest, expected)
+                for digest, (_, expected) in zip(digests, code_files)
+            ]
+        return results, code_results
+
+    def _check_code_hash(self, actual_hash: str, expected_hash: str) -> bool:
         if actual_hash != expected_hash:
             self.errors.append(
                 f"Code hash mismatch!\n"
@@ -234,18 +324,44 @@ class AIAttestationVerifier:
             )
             return False
 
-        print(f"  ✓ Code hash verified: {actual_hash[:16]}...")
+        self._emit("  ✓ Code hash verified: %.16s...", actual_hash)
         return True
 
 
+def _verify_one(path: str) -> Tuple[str, bool, List[str]]:
+    """Quietly verify one attestation file; runs in a worker process for multi-file audits"""
+    try:
+        attestation_data = _load_json_file(path)
+    except (OSError, ValueError) as e:
+        return path, False, [str(e)]
+    verifier = AIAttestationVerifier(quiet=True)
+    return path, verifier.verify_attestation(attestation_data), verifier.errors + verifier.warnings
+
+
+def _verify_files(paths: List[str], quiet: bool) -> bool:
+    """Verify several attestation files in parallel and print one line per file"""
+    with ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as pool:
+        results = list(pool.map(_verify_one, paths, chunksize=max(1, len(paths) // 64)))
+    failed = 0
+    for path, ok, messages in results:
+        failed += not ok
+        if not quiet:
+            print(f"{'✅' if ok else '❌'} {path}")
+            for message in messages:
+                print(f"    {message}")
+    if not quiet:
+        print(f"\n{len(results) - failed}/{len(results)} attestations verified")
+    return failed == 0
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Verify TEE attestation for AI-generated code"
     )
     parser.add_argument(
         "attestation_file",
-        nargs="?",
-        help="Path to attestation JSON file"
+        nargs="*",
+        help="Path to attestation JSON file (several files are verified in parallel)"
     )
     parser.add_argument(
         "--from-api",
@@ -257,8 +373,15 @@ def main():
         metavar="CODE_FILE",
         help="Also verify generated code hash"
     )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Only report the result through the exit status"
+    )
 
     args = parser.parse_args()
+    if args.verify_code and len(args.attestation_file) > 1:
+        parser.error("--verify-code needs exactly one attestation file")
 
     # Load attestation data
     if args.from_api:
@@ -266,12 +389,14 @@ def main():
         # TODO: Implement API fetching
         print("API fetching not yet implemented")
         sys.exit(1)
+    elif len(args.attestation_file) > 1:
+        sys.exit(0 if _verify_files(args.attestation_file, args.quiet) else 1)
     elif args.attestation_file:
+        attestation_file = args.attestation_file[0]
         try:
-            with open(args.attestation_file, 'r') as f:
-                attestation_data = json.load(f)
+            attestation_data = _load_json_file(attestation_file)
         except FileNotFoundError:
-            print(f"Error: File not found: {args.attestation_file}")
+            print(f"Error: File not found: {attestation_file}")
             sys.exit(1)
         except json.JSONDecodeError as e:
             print(f"Error: Invalid JSON: {e}")
@@ -281,7 +406,7 @@ def main():
         sys.exit(1)
 
     # Verify attestation
-    verifier = AIAttestationVerifier()
+    verifier = AIAttestationVerifier(quiet=args.quiet)
     success = verifier.verify_attestation(attestation_data)
 
     # Verify code hash if provided
@@ -289,9 +414,7 @@ def main():
         response_hash = attestation_data.get("inference", {}).get("response_hash")
         if response_hash:
             try:
-                with open(args.verify_code, 'r') as f:
-                    code = f.read()
-                verifier.verify_code_hash(code, response_hash)
+                success = verifier.verify_code_file(args.verify_code, response_hash)
             except FileNotFoundError:
                 print(f"Warning: Code file not found: {args.verify_code}")
 